@@ -1,22 +1,40 @@
 import re
+from typing import Iterator
 from Log import Log
 
+_tableStart=re.compile(r"<table[^>]*sortable\">", flags=re.DOTALL|re.IGNORECASE)
+_tableRow=re.compile(r"<tr.*?>(.*?)</tr>", flags=re.DOTALL|re.IGNORECASE|re.MULTILINE)
+_tableCell=re.compile(r"<t[dh](?:\s[^>]*)?>(.*?)</t[dh]>", flags=re.DOTALL|re.IGNORECASE)
+
+
 def ReadClassicFanzinesTable(html: str) -> list[str]|None:
     # Parse the HTML looking for the classic fanzines table
-    m=re.search(r"<table[^>]*sortable\">(.*)$", html, flags=re.DOTALL|re.IGNORECASE)
+    start=_FindClassicFanzinesTable(html, "ReadClassicFanzinesTable")
+    if start is None:
+        return None
+    return list(_IterRows(html, start))
+
+
+# Walk the classic fanzines table once, yielding its rows as they are found: each row's inner HTML or, when cells=True,
+# the list of its cells' inner HTML.
+# The page is scanned by offset rather than sliced, so nothing is copied beyond the rows themselves and a large
+# index page parses in linear time.
+def IterClassicFanzinesTable(html: str, cells: bool=False) -> Iterator[str] | Iterator[list[str]]:
+    start=_FindClassicFanzinesTable(html, "IterClassicFanzinesTable")
+    if start is None:
+        return
+    for row in _IterRows(html, start):
+        yield _tableCell.findall(row) if cells else row
+
+
+def _FindClassicFanzinesTable(html: str, caller: str) -> int|None:
+    m=_tableStart.search(html)
     if m is None:
-        Log("ReadClassicFanzinesTable: Could not find sortable table.")
+        Log(f"{caller}: Could not find sortable table.")
         return None
-    table=m.groups()[0]
-    
-    # Go through the table finding, extracting and then deleting the rows one-by-one
-    rows=[]
-    while True:
-        m=re.search(r"<tr.*?>(.*?)</tr>", table, flags=re.DOTALL|re.IGNORECASE|re.MULTILINE)
-        if m is None:
-            break
-        rows.append(m.groups()[0])
-        table=table[m.end():]       # Remove the just-matched row (and all preceding it) from table.
-        #table=re.sub(r"<tr.*?>(.*?)</tr>", "?", table, count=1, flags=re.DOTALL|re.IGNORECASE)
-
-    return rows
\ No newline at end of file
+    return m.end()
+
+
+def _IterRows(html: str, start: int) -> Iterator[str]:
+    for m in _tableRow.finditer(html, start):
+        yield m.group(1)
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, DefaultDict, TypeVar
+from typing import Any, Callable, DefaultDict, TypeVar
 import os
 import sys
 import ctypes
@@ -8,6 +8,7 @@ import re
 import stat
 import json
 import html
+import html.entities
 
 from unidecode import unidecode
 from datetime import datetime
@@ -22,12 +23,58 @@ except ImportError:
     _wx = None
 from html import escape, unescape
 from contextlib import suppress
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 
 from Log import Log, LogClose, LogError
 
 
+#=======================================================
+# Compiled regex registry
+# Every pattern the helpers below use is compiled once and kept here, so a hot helper never recompiles (re's own
+# cache is small and shared with every other module, and a busy scrape overflows it).
+#   Regex() is for fixed patterns written into the code: they are a finite set, so they are kept forever.
+#   TagRegex() is for patterns built per call from a tag or other caller data (f-strings): there can be any number
+#       of those, so they live in a bounded LRU cache instead.
+# RegexCacheStats() reports how well it is working.
+_regexRegistry: dict[tuple[str, int], re.Pattern]={}
+_tagRegexCache: OrderedDict[tuple[str, int], re.Pattern]=OrderedDict()
+_TAG_REGEX_CACHE_MAX=512
+_regexStats={"compiles": 0, "hits": 0, "evictions": 0}
+
+
+def Regex(pattern: str, flags: int=0) -> re.Pattern:
+    key=(pattern, int(flags or 0))
+    compiled=_regexRegistry.get(key)
+    if compiled is not None:
+        _regexStats["hits"]+=1
+        return compiled
+    compiled=_regexRegistry[key]=re.compile(pattern, key[1])
+    _regexStats["compiles"]+=1
+    return compiled
+
+
+def TagRegex(pattern: str|re.Pattern, flags: int=0) -> re.Pattern:
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    key=(pattern, int(flags or 0))
+    compiled=_tagRegexCache.get(key)
+    if compiled is not None:
+        _tagRegexCache.move_to_end(key)
+        _regexStats["hits"]+=1
+        return compiled
+    compiled=_tagRegexCache[key]=re.compile(pattern, key[1])
+    _regexStats["compiles"]+=1
+    if len(_tagRegexCache) > _TAG_REGEX_CACHE_MAX:
+        _tagRegexCache.popitem(last=False)
+        _regexStats["evictions"]+=1
+    return compiled
+
+
+def RegexCacheStats() -> dict[str, int]:
+    return _regexStats | {"fixed": len(_regexRegistry), "tagged": len(_tagRegexCache)}
+
+
 #=======================================================
 # Locate all matches to the pattern and remove them
 # Numgroups is the number of matching groups in the pattern
@@ -45,23 +92,35 @@ def SearchAndReplace(pattern: str, inputstr: str, replacement: str, numGroups: i
     if ignorenewlines:
         flags=flags | re.DOTALL
 
-    # Keep looping and removing matched material until the match fails
     found: list[str] | list[list[str]]=[]
-    while True:
-        # Look for a match
-        m=re.search(pattern, inputstr, flags=flags)
 
-        # If none is found, return the results
-        if m is None:
-            return found, inputstr
-        # We found something. Append it to the list of found snippets
+    def collect(m: re.Match) -> None:
+        # Append what we found to the list of found snippets
         # When numGroups is zero we just replace the text without saving it.
         if numGroups == 1:
             found.append(m.groups()[0])
         elif numGroups > 1:
             found.extend([x for x in m.groups()])
-        # Replace the found text
-        inputstr=re.sub(pattern, replacement, inputstr, 1, flags=flags)
+
+    inputstr=_ReplaceAllMatches(TagRegex(pattern, flags), inputstr, replacement, collect)
+    return found, inputstr
+
+
+#=======================================================
+# Replace every match of regex in s by replacement (which may use \1-style group references), calling collect() on each
+#   match as it goes.  This is one linear pass over s rather than a search-and-replace-the-first loop, which rescans
+#   and rebuilds the whole string for every match.
+# Removing text can splice together a new match that the old rescan-from-the-start loop would also have found, so we
+#   keep making passes until one finds nothing.  In practice that is one pass plus a check.
+def _ReplaceAllMatches(regex: re.Pattern, s: str, replacement: str, collect) -> str:
+    def substitute(m: re.Match) -> str:
+        collect(m)
+        return m.expand(replacement)
+
+    while True:
+        s, count=regex.subn(substitute, s)
+        if count == 0:
+            return s
 
 
 #=======================================================
@@ -86,11 +145,11 @@ def PyiResourcePath(relative_path) -> str:
 #=======================================================
 # Locate and return a chunk of text bounded by two patterns
 def SearchAndExtractBounded(source: str, startpattern: str, endpattern: str, Flags=0) -> tuple[str|None, str]:
-    m=re.search(startpattern, source)
+    m=TagRegex(startpattern).search(source)
     if m is None:
         return None, source
     loc=m.span()[1]
-    m=re.search(endpattern, source[loc:], flags=Flags)
+    m=TagRegex(endpattern, Flags).search(source[loc:])
     if m is None:
         return None, source
     return source[loc:loc+m.span()[0]], source[loc+m.span()[1]+1:]
@@ -103,22 +162,19 @@ def SearchAndExtractBounded(source: str, startpattern: str, endpattern: str, Fla
 # The default is to search *everying, ignoring line boundaries and case.
 # When there is no match, (middle) is returned as None
 def SearchExtractAndRemoveBounded(source: str, pattern: str, Flags=re.IGNORECASE | re.DOTALL) -> tuple[str|None, str]:
-    m=re.search(pattern, source, flags=Flags)
+    m=TagRegex(pattern, Flags).search(source)
     if m is None:
         return None, source
     middle=m.groups()[1]
-    source=re.sub(pattern, "", source, count=1)
+    source=source[:m.start()]+source[m.end():]
     return middle, source
 
 
 # Remove *all* the matches
 def SearchExtractAndRemoveBoundedAll(source: str, pattern: str, Flags=re.IGNORECASE | re.DOTALL) -> tuple[list[str], str]:
     matches=[]
-    while True:
-        middle, source=SearchExtractAndRemoveBounded(source, pattern, Flags=Flags)
-        if middle is None:
-            return matches, source
-        matches.append(f"<td{middle}")
+    source=_ReplaceAllMatches(TagRegex(pattern, Flags), source, "", lambda m: matches.append(f"<td{m.groups()[1]}"))
+    return matches, source
 
 
 #=======================================================
@@ -200,9 +256,9 @@ def ToNumeric(val: None | int | float | str) -> None | int | float:
 # This version does not require
 def FindLinkInString(s: str) -> tuple[str, str, str, str]:
     # Get rid of any class=stuff crud
-    s=re.sub(r'class=".+?"', "", s, count=10, flags=re.IGNORECASE)
+    s=Regex(r'class=".+?"', re.IGNORECASE).sub("", s, count=10)
     pat=r"^(.*?)<a\s+href=['\"](https?:)?(.*?)['\"]>(.*?)</a>(.*)$"
-    m=re.match(pat, s, flags=re.IGNORECASE|re.DOTALL)
+    m=Regex(pat, re.IGNORECASE|re.DOTALL).match(s)
     if m is None:
         return s, "", "", ""
     return m.groups()[0], m.groups()[2], m.groups()[3], m.groups()[4]
@@ -213,10 +269,10 @@ def FindLinkInString(s: str) -> tuple[str, str, str, str]:
 # This version does not require
 def FindHrefInString(s: str) -> tuple[str, str, str, str]:
     # Get rid of any class=stuff crud
-    s=re.sub(r'class=".+?"', "", s, count=10, flags=re.IGNORECASE)
-    m=re.match(r"^(.*?)<a +href=['\"](https?:)?(.*?)['\"]>(.*)</a>.*$", s, flags=re.IGNORECASE|re.DOTALL)
+    s=Regex(r'class=".+?"', re.IGNORECASE).sub("", s, count=10)
+    m=Regex(r"^(.*?)<a +href=['\"](https?:)?(.*?)['\"]>(.*)</a>.*$", re.IGNORECASE|re.DOTALL).match(s)
     if m is None:
-        m=re.match(r"^(.*?)<a +href=['\"](https?:)?(.*?)['\"]>(.*)$", s, flags=re.IGNORECASE|re.DOTALL)     # Some rows lack the trailing "</A>" !
+        m=Regex(r"^(.*?)<a +href=['\"](https?:)?(.*?)['\"]>(.*)$", re.IGNORECASE|re.DOTALL).match(s)     # Some rows lack the trailing "</A>" !
         if m is None:
             return s, "", "", ""
     if len(m.groups()) == 5:
@@ -310,10 +366,10 @@ def ExtractHTMLUsingFanacTagCommentPair(s: str, tag: str) -> str:
 
 # The comment is <!--fanac-<tag><stuff>-->, where tag is the ID and stuff is the payload
 def InsertInvisibleTextInsideFanacComment(s: str, tag: str, insert: str) -> str:
-    return re.sub(fr"<!--\s*fanac-{tag}\s*(.*?)\s*-->", f"<!-- fanac-{tag} {insert} -->", s, count=1,flags=re.IGNORECASE|re.DOTALL)
+    return TagRegex(fr"<!--\s*fanac-{tag}\s*(.*?)\s*-->", re.IGNORECASE|re.DOTALL).sub(f"<!-- fanac-{tag} {insert} -->", s, count=1)
 
 def ExtractInvisibleTextInsideFanacComment(s: str, tag: str) -> str:
-    m=re.search(fr"<!--\s*fanac-{tag}\s*(.*?)\s*-->", s, flags=re.IGNORECASE|re.DOTALL)
+    m=TagRegex(fr"<!--\s*fanac-{tag}\s*(.*?)\s*-->", re.IGNORECASE|re.DOTALL).search(s)
     if m is None:
         return ""
     return m.groups()[0].strip()
@@ -322,15 +378,165 @@ def ExtractInvisibleTextInsideFanacComment(s: str, tag: str) -> str:
 # Insert text between HTML comments:  <!tag-->stuff<!tag-->
 def InsertBetweenHTMLComments(s: str, tag: str, val: str) -> str:
     # Look for a section of the input string surrounded by  "<!--- tag -->" and replace it all by val
-    return re.sub(rf"<!--\s*{tag}\s*-->(.*?)<!--\s*{tag}\s*-->", f"<!--{tag}-->{val}<!--{tag}-->", s, flags=re.IGNORECASE|re.DOTALL|re.MULTILINE)
+    return TagRegex(rf"<!--\s*{tag}\s*-->(.*?)<!--\s*{tag}\s*-->", re.IGNORECASE|re.DOTALL|re.MULTILINE).sub(f"<!--{tag}-->{val}<!--{tag}-->", s)
 
 def ExtractBetweenHTMLComments(s: str, tag: str) -> str:
-    m=re.search(rf"<!--\s*{tag}\s*-->(.*?)<!--\s*{tag}\s*-->", s, flags=re.IGNORECASE|re.DOTALL)
+    m=TagRegex(rf"<!--\s*{tag}\s*-->(.*?)<!--\s*{tag}\s*-->", re.IGNORECASE|re.DOTALL).search(s)
     if m is None:
         return ""
     return m.groups()[0].strip()
 
 
+# ==================================================================================
+# A page template with all its fanac comment regions indexed in one pass.
+# The functions above each rescan and rebuild the whole page for a single region; filling many regions that way
+#   costs a full scan and a full copy per region.  FanacTemplate finds every region once and then renders a page
+#   from any number of updates with a single join.  It never changes after parsing, so one FanacTemplate can be
+#   shared by every page built from the same template (FanacTemplate.Parse() caches them by text).
+# It knows the same three kinds of region as the functions above:
+#   regions:    <!-- fanac-<tag> start--> ... <!-- fanac-<tag> end-->     (cf. InsertHTMLUsingFanacStartEndCommentPair)
+#   between:    <!--<tag>--> ... <!--<tag>-->                             (cf. InsertHTMLUsingFanacTagCommentPair, InsertBetweenHTMLComments)
+#   payloads:   <!-- fanac-<tag> payload -->                              (cf. InsertInvisibleTextInsideFanacComment)
+# Tags are matched case-insensitively.  A tag must not contain whitespace, and a payload is separated from its tag by whitespace.
+class FanacTemplate:
+    _cache: OrderedDict[str, FanacTemplate]=OrderedDict()
+    _CACHE_MAX=64
+
+    def __init__(self, text: str):
+        self._text=text
+        # The page is split into pieces: runs of literal text, and each HTML comment as a piece of its own
+        self._pieces: list[str]=[]
+        self._regions: dict[str, tuple[int, int]]={}        # tag -> (index of start marker, index of end marker)
+        self._between: dict[str, list[tuple[int, int]]]={}  # tag -> [(index of opening marker, index of closing marker), ...]
+        self._payloads: dict[str, list[int]]={}             # tag -> [index of the payload comment, ...]
+
+        openStart: dict[str, int]={}
+        openBetween: dict[str, int]={}
+        loc=0
+        for m in Regex(r"<!--(.*?)-->", re.DOTALL).finditer(text):
+            if m.start() > loc:
+                self._pieces.append(text[loc:m.start()])
+            index=len(self._pieces)
+            self._pieces.append(m.group(0))
+            loc=m.end()
+
+            body=m.group(1)
+            mm=Regex(r"^\s*fanac-(\S+)\s+(start|end)\s*$", re.IGNORECASE).match(body)
+            if mm is not None:
+                tag=mm.group(1).lower()
+                if mm.group(2).lower() == "start":
+                    openStart.setdefault(tag, index)
+                elif tag in openStart and tag not in self._regions:
+                    self._regions[tag]=(openStart[tag], index)
+                continue
+            mm=Regex(r"^\s*fanac-(\S+)(?:\s+(.*?))?\s*$", re.IGNORECASE|re.DOTALL).match(body)
+            if mm is not None:
+                self._payloads.setdefault(mm.group(1).lower(), []).append(index)
+            mm=Regex(r"^\s*(\S+)\s*$").match(body)
+            if mm is not None:
+                tag=mm.group(1).lower()
+                if tag in openBetween:
+                    self._between.setdefault(tag, []).append((openBetween.pop(tag), index))
+                else:
+                    openBetween[tag]=index
+        if loc < len(text):
+            self._pieces.append(text[loc:])
+
+
+    # Get the FanacTemplate for a page's text, parsing it only the first time that text is seen
+    @classmethod
+    def Parse(cls, text: str) -> FanacTemplate:
+        template=cls._cache.get(text)
+        if template is not None:
+            cls._cache.move_to_end(text)
+            return template
+        template=cls._cache[text]=FanacTemplate(text)
+        if len(cls._cache) > cls._CACHE_MAX:
+            cls._cache.popitem(last=False)
+        return template
+
+
+    def __str__(self) -> str:
+        return self._text
+
+    @property
+    def Regions(self) -> list[str]:
+        return list(self._regions.keys())
+
+    @property
+    def Between(self) -> list[str]:
+        return list(self._between.keys())
+
+    @property
+    def Payloads(self) -> list[str]:
+        return list(self._payloads.keys())
+
+
+    def _Contents(self, span: tuple[int, int]) -> str:
+        return "".join(self._pieces[span[0]+1:span[1]])
+
+    # The contents of the <!-- fanac-<tag> start--> ... <!-- fanac-<tag> end--> region, or "" if there is none
+    def Region(self, tag: str) -> str:
+        span=self._regions.get(tag.lower())
+        return "" if span is None else self._Contents(span)
+
+    # The (stripped) contents of the first <!--<tag>--> ... <!--<tag>--> region, or "" if there is none
+    def BetweenComments(self, tag: str) -> str:
+        spans=self._between.get(tag.lower())
+        return "" if not spans else self._Contents(spans[0]).strip()
+
+    # The payload of the first <!-- fanac-<tag> payload --> comment, or "" if there is none
+    def Payload(self, tag: str) -> str:
+        indexes=self._payloads.get(tag.lower())
+        if not indexes:
+            return ""
+        m=Regex(r"^<!--\s*fanac-\S+(?:\s+(.*?))?\s*-->$", re.IGNORECASE|re.DOTALL).match(self._pieces[indexes[0]])
+        return (m.group(1) or "").strip()
+
+
+    # Render the page with the given regions replaced.  Each argument maps tags to their new contents.
+    # regions and between replace everything between the two markers (the markers themselves are kept); between
+    #   replaces every pair of <!--<tag>--> markers, as InsertBetweenHTMLComments() does.  payloads rewrites the
+    #   first <!-- fanac-<tag> ... --> comment as <!-- fanac-<tag> payload -->.
+    # Tags that are not in the template are logged and ignored.
+    def Render(self, regions: dict[str, str]|None=None, between: dict[str, str]|None=None, payloads: dict[str, str]|None=None) -> str:
+        replaceFrom: dict[int, tuple[int, str]]={}     # index of opening marker -> (index of closing marker, new contents)
+        for tag, val in (regions or {}).items():
+            span=self._regions.get(tag.lower())
+            if span is None:
+                LogError(f"FanacTemplate.Render: Unable to locate tag pair <!-- fanac-{tag} start-->....<!-- fanac-{tag} end-->")
+                continue
+            replaceFrom[span[0]]=(span[1], val)
+        for tag, val in (between or {}).items():
+            spans=self._between.get(tag.lower())
+            if not spans:
+                LogError(f"FanacTemplate.Render: Unable to locate tag pair <!--{tag}-->....<!--{tag}-->")
+                continue
+            for span in spans:
+                replaceFrom[span[0]]=(span[1], val)
+        replacePiece: dict[int, str]={}
+        for tag, val in (payloads or {}).items():
+            indexes=self._payloads.get(tag.lower())
+            if not indexes:
+                LogError(f"FanacTemplate.Render: Unable to locate comment <!-- fanac-{tag} -->")
+                continue
+            replacePiece[indexes[0]]=f"<!-- fanac-{tag} {val} -->"
+
+        if not replaceFrom and not replacePiece:
+            return self._text
+
+        out: list[str]=[]
+        i=0
+        while i < len(self._pieces):
+            out.append(replacePiece.get(i, self._pieces[i]))
+            if i in replaceFrom:
+                i, val=replaceFrom[i]
+                out.append(val)
+                continue        # Resume at the closing marker
+            i+=1
+        return "".join(out)
+
+
 # =============================================================================
 # Converting between page names and poge file names (urlname) in MediaWiki
 # Name -> filename
@@ -381,7 +587,7 @@ def MakeFancyLink(fancyName: str, displayName: str=None) -> str:
 # link|display text (if they are different
 # display text (if they are the same
 def UnmakeFancyLink(link: str) -> list[str]:
-    m=re.match(r"^(.*?)<a href=\"?https?://fancyclopedia.org/(.*?)\"?>(.*?)</a>(.*)$", link)
+    m=Regex(r"^(.*?)<a href=\"?https?://fancyclopedia.org/(.*?)\"?>(.*?)</a>(.*)$").match(link)
     if m is None:
         return [WikiUrlnameToWikiPagename(link)]
 
@@ -393,7 +599,7 @@ def UnmakeFancyLink(link: str) -> list[str]:
 
 # Take a string containing a fancy link and remove the link, leaving the link text
 def RemoveFancyLink(link: str) -> str:
-    m=re.match(r"^(.*?)<a href=\"?https?://fancyclopedia.org/.*?\"?>(.*?)</a>(.*)$", link)
+    m=Regex(r"^(.*?)<a href=\"?https?://fancyclopedia.org/.*?\"?>(.*?)</a>(.*)$").match(link)
     if m is None:
         return link
 
@@ -417,7 +623,7 @@ def FormatLink(url: str, text: str, ForceHTTP: bool=False, ForceHTTPS: bool=Fals
     # But it *can* be part of a link to an anchor on a page or a part of a pdf reference.
     # Look for #s in a LinkTargetsURL *before* a .pdf extension and convert them to %23s
     if '#' in url:
-        m=re.match(r"(.*)(\.pdf.*)", url, re.IGNORECASE)
+        m=Regex(r"(.*)(\.pdf.*)", re.IGNORECASE).match(url)
         if m is not None:
             url=m.groups()[0].replace("#", "%23")+m.groups()[1]
     url=UnicodeToHtml(url)
@@ -455,10 +661,10 @@ def UnformatLinks(s: str) -> str|None:
 
     try:
         # Convert substrings of the form '<a href="'(stuff1)'>'(stuff2)'</a>'  to (stuff2)
-        s=re.sub(r'(<a\s+href=".+?">)(.+?)(</a>)', "\\2", s)
+        s=Regex(r'(<a\s+href=".+?">)(.+?)(</a>)').sub("\\2", s)
 
         # And then there are Mediawiki redirects
-        s=re.sub(r'(<a\s+class=".+?">)(.+?)(</a>)', "\\2", s)
+        s=Regex(r'(<a\s+class=".+?">)(.+?)(</a>)').sub("\\2", s)
     except Exception:
         pass
     return s
@@ -536,7 +742,7 @@ def CanonicizeColumnHeaders(header: str) -> str:
 # Return True/False and remaining text after <bra> </bra> is removed
 # Return the whole string if brackets not found
 def ScanForBracketedText(s: str, bra: str) -> tuple[bool, str]:
-    m=re.match(fr"\w*<{bra}>(.*)</{bra}>\w*$", s)
+    m=TagRegex(fr"\w*<{bra}>(.*)</{bra}>\w*$").match(s)
     if m is None:
         return False, s
     return True, m.groups()[0]
@@ -552,7 +758,7 @@ def ParseFirstStringBracketedText(s: str, bracket: str, IgnoreCase=False) -> tup
     flags=re.DOTALL
     if IgnoreCase:
         flags=flags|re.IGNORECASE
-    m=re.match(pattern, s,  flags)
+    m=TagRegex(pattern, flags).match(s)
     if m is None:
         return s, "", ""
 
@@ -565,7 +771,7 @@ def ParseFirstStringBracketedText(s: str, bracket: str, IgnoreCase=False) -> tup
 def RemoveTopBracketedText(s: str, bracket: str, stripHtml: bool=True) -> tuple[str, bool]:
 
     pattern=fr"^\s*<{bracket}>(.*?)</{bracket}>\s*$"
-    m=re.search(pattern, s,  flags=re.DOTALL)     # Do it multiline
+    m=TagRegex(pattern, re.DOTALL).search(s)     # Do it multiline
     if m is None:
         return s, False
 
@@ -581,13 +787,13 @@ def FindAndReplaceBracketedText(s: str, bracket: str, replacement: str, stripHtm
     flags=re.DOTALL
     if caseInsensitive:
         flags=flags | re.IGNORECASE
-    m=re.search(pattern, s,  flags=flags)     # Do it multiline
+    m=TagRegex(pattern, flags).search(s)     # Do it multiline
     if m is None:
         return s, False
     # match=m.groups()[0]
     # if stripHtml:
     #     match=RemoveAllHTMLTags(match)      #TODO: Why is this here!??
-    s2=re.sub(pattern, replacement, s, flags=flags, count=1)
+    s2=TagRegex(pattern, flags).sub(replacement, s, count=1)
     return s2, True
 
 
@@ -604,7 +810,7 @@ def FindAndReplaceBracketedText(s: str, bracket: str, replacement: str, stripHtm
 def FindNextBracketedText(s: str) -> tuple[str, str, str, str]:
 
     pattern="^(.*?)<(?P<tag>[a-z0-9][^>]*?)>(.*?)</(?P=tag)>(.*)$"
-    m=re.search(pattern, s,  flags=re.DOTALL|re.IGNORECASE)
+    m=Regex(pattern, re.DOTALL|re.IGNORECASE).search(s)
     if m is None:
         return s, "", "", ""
 
@@ -617,7 +823,7 @@ def FindNextBracketedText(s: str) -> tuple[str, str, str, str]:
 # Return the contents of the first pair of the specified brackets found and the remainder of the input string
 def FindBracketedText2(s: str, tag: str, caseInsensitive=False, includeBrackets=False) -> tuple[str, str]:
     # We want to remove any leading or trailing whitespace
-    m=re.match(r"^\s*(.*?)\s*$", s, re.DOTALL)
+    m=Regex(r"^\s*(.*?)\s*$", re.DOTALL).match(s)
     if m is not None:
         s=m.group(1)
     return FindBracketedText(s, tag, stripHtml=False, caseInsensitive=caseInsensitive, includeBrackets=includeBrackets)
@@ -635,7 +841,7 @@ def FindBracketedText(s: str, tag: str, stripHtml: bool=True, stripWhitespace: b
     flags=re.DOTALL
     if caseInsensitive:
         flags=flags | re.IGNORECASE
-    m=re.search(pattern, s,  flags)
+    m=TagRegex(pattern, flags).search(s)
     if m is None:
         return "", s
     pre=s[:m.regs[0][0]]
@@ -654,7 +860,7 @@ def FindAndReplaceSingleBracketedText(input: str, tag: str, replacement: str, ca
     if caseInsensitive:
         flags=flags|re.IGNORECASE
 
-    m=re.search(f"(<{tag}.*?>)", input,  flags)
+    m=TagRegex(f"(<{tag}.*?>)", flags).search(input)
     if m is None:
         return input
     pre=input[:m.regs[0][1]]
@@ -667,7 +873,7 @@ def FindAndReplaceSingleBracketedText(input: str, tag: str, replacement: str, ca
 # The brackets overall do not need to be balanced as long as there is a substring with balanced brackets.
 def ContainsBracketedText(s: str) -> bool:
 
-    m=re.search("<[^<>]+>", s)
+    m=Regex("<[^<>]+>").search(s)
     if m is None:
         return False
     return True
@@ -680,7 +886,7 @@ def ParseFirstBracketedText(s: str, b1: str, b2: str) -> tuple[str, str, str]:
     b1=b1.replace("[", r"\[").replace("(", r"\(").replace("{", r"\{")
 
     pattern=r"^(.*?)"+b1+"(.+?)"+b2+"(.*)$"
-    m=re.search(pattern, s,  re.DOTALL)
+    m=TagRegex(pattern, re.DOTALL).search(s)
     if m is None:
         return s, "", ""
 
@@ -700,7 +906,7 @@ def RemoveHyperlink(s: str, repeat: bool=False) -> str:
 # E.g., <a http:xxx.com>abc</a>  ==> abc
 def RemoveHyperlinkContainingPattern(s: str, pattern: str, repeat: bool=False, flags: re.RegexFlag | None=None) -> str:
     while True:
-        m=re.match(f"(.*?)<a.*?>({pattern})</a>(.*)$", s, flags)
+        m=TagRegex(f"(.*?)<a.*?>({pattern})</a>(.*)$", flags).match(s)
         if m:
             s=m.groups()[0]+m.groups()[1]+m.groups()[2]
             if repeat:
@@ -714,7 +920,7 @@ def RemoveHyperlinkContainingPattern(s: str, pattern: str, repeat: bool=False, f
 # Return the contents of the first pair of brackets found
 def FindWikiBracketedText(s: str) -> str:
 
-    m=re.search(r"\[\[(:?.+)]]", s)
+    m=Regex(r"\[\[(:?.+)]]").search(s)
     if m is None:
         return ""
     return m.groups()[0]
@@ -726,9 +932,9 @@ def StripSpecificTag(s: str, tag: str, CaseSensitive=False, Number=1)-> str:
     while Number > 0:
         pattern=fr"^<{tag}>(.*)</{tag}>$"
         if CaseSensitive:
-            m=re.match(pattern, s)
+            m=TagRegex(pattern).match(s)
         else:
-            m=re.match(pattern, s, re.IGNORECASE)
+            m=TagRegex(pattern, re.IGNORECASE).match(s)
         if m is None:
             break
         Number-=1
@@ -739,7 +945,7 @@ def StripSpecificTag(s: str, tag: str, CaseSensitive=False, Number=1)-> str:
 #=====================================================================================
 # Remove a matched pair of external <brackets> <containing anything> from a string, returning the inside
 def StripExternalTags(s: str)-> str|None:
-    m=re.match("^<.*>(.*)</.*>$", s)
+    m=Regex("^<.*>(.*)</.*>$").match(s)
     if m is None:
         return None
     return m.groups()[0]
@@ -748,7 +954,7 @@ def StripExternalTags(s: str)-> str|None:
 #=====================================================================================
 # Remove a matched pair of <brackets> <containing anything> from a string, returning the inside
 def StripWikiBrackets(s: str)-> str:
-    m=re.match(r"^\[\[(.*)]]$", s)
+    m=Regex(r"^\[\[(.*)]]$").match(s)
     if m is None:
         return s
     return m.groups()[0]
@@ -798,7 +1004,7 @@ def RemoveAccents(s: str) -> str:
 #=====================================================================================
 # Most non-alphanumeric characters can't be used in filenames with Jack's software on fanac.org. Turn runs of those characters into a single underscore
 def RemoveScaryCharacters(name: str) -> str:
-    return RemoveAccents("".join(re.sub(r"[?*&%$#@'><:;,.{}\][=+)(^!\s]+", "_", name)))
+    return RemoveAccents("".join(Regex(r"[?*&%$#@'><:;,.{}\][=+)(^!\s]+").sub("_", name)))
 
 
 #=====================================================================================
@@ -815,12 +1021,12 @@ def CaseInsensitiveReplace(s: str, old: str, new: str) -> str:
 #=====================================================================================
 # Turn all strings of whitespace (including HTMLish whitespace) to a single space
 def CompressWhitespace(s: str) -> str:
-    return re.sub(r"\s+", " ", RemoveFunnyWhitespace(s))
+    return Regex(r"\s+").sub(" ", RemoveFunnyWhitespace(s))
 
 
 #=====================================================================================
 def CompressAllWhitespaceAndRemovePunctuation(s: str) -> str:
-    s=re.sub(r"[.,\-?!_*\'\";:]+", " ", s)
+    s=Regex(r"[.,\-?!_*\'\";:]+").sub(" ", s)
     return CompressAllWhitespace(s)
 
 #=====================================================================================
@@ -840,16 +1046,16 @@ def RemoveFunnyWhitespace(s: str) -> str:
 def RemoveHTMLishWhitespace(s: str, replacement: str=" ") -> str:
     s=unescape(s)                                           # decode all HTML entities first (e.g. &nbsp; → \xa0, &amp; → &)
     s=s.replace("\xa0", replacement)                        # non-breaking space → replacement
-    return re.sub(r"<br>|</br>|<br/>", replacement, s, flags=re.IGNORECASE)
+    return Regex(r"<br>|</br>|<br/>", re.IGNORECASE).sub(replacement, s)
 
 def RemoveLinebreaks(s: str, replacement: str="") -> str:
-    return re.sub(r"<br>|</br>|<br/>|\n", replacement, s, flags=re.IGNORECASE | re.DOTALL)
+    return Regex(r"<br>|</br>|<br/>|\n", re.IGNORECASE | re.DOTALL).sub(replacement, s)
 
 
 #=====================================================================================
 # Remove <Hx>-type brackets from a string.
 def RemoveHxTags(s: str) -> str:
-    return re.sub(r"</?h\d>", "", s, flags=re.IGNORECASE)
+    return Regex(r"</?h\d>", re.IGNORECASE).sub("", s)
 
 #=====================================================================================
 def CompressAllWhitespace(s: str) -> str:
@@ -865,7 +1071,7 @@ def RemoveHTMLDebris(s: str) -> str:
 #=====================================================================================
 # Remove all html tags (or at least those which have been an issue
 def RemoveAllHTMLTags(s: str) -> str:
-    vv=re.sub('(</?[a-zA-Z0-9]+>)', "", s)
+    vv=Regex('(</?[a-zA-Z0-9]+>)').sub("", s)
     return vv
 
 
@@ -873,7 +1079,7 @@ def RemoveAllHTMLTags(s: str) -> str:
 # Remove all html tags (or at least those which have been an issue
 # This one is more aggressive
 def RemoveAllHTMLTags2(s: str) -> str:
-    vv=re.sub('(</?[a-zA-Z0-9]+>)', "", s)
+    vv=Regex('(</?[a-zA-Z0-9]+>)').sub("", s)
     return vv
 
 
@@ -881,20 +1087,20 @@ def RemoveAllHTMLTags2(s: str) -> str:
 # Remove the top level of html tags.  I.e., <a>xx<>/a>yy<b><c>zzz</c></b>  -->  yy<c>zzz</c>
 def RemoveTopLevelHTMLTags(s: str, LeaveLinks: bool=False) -> str:
     if not LeaveLinks:
-        return re.sub(r'<([a-zA-Z0-9]+)[^>]*>(.+?)</\1>', r"\2", s)
-    return re.sub(r'<([b-z0-9][a-z0-9]*)[^>]*?>(.*?)</\1>', r"\2", s)
+        return Regex(r'<([a-zA-Z0-9]+)[^>]*>(.+?)</\1>').sub(r"\2", s)
+    return Regex(r'<([b-z0-9][a-z0-9]*)[^>]*?>(.*?)</\1>').sub(r"\2", s)
 
 #=====================================================================================
 # Remove all HTML-like tags (No need for them to be balanced!)
 def RemoveAllHTMLLikeTags(s: str) -> str:
-    vv=re.sub(r"(</?.*?/?>)", "", s)
+    vv=Regex(r"(</?.*?/?>)").sub("", s)
     return vv
 
 
 #=====================================================================================
 # Change all occurances of </br> and <br/> to <br> (case insensitive)
 def RegularizeBRTags(s: str) -> str:
-    return re.sub(r"<(/br|br/)>", "<br>", s, flags=re.IGNORECASE)
+    return Regex(r"<(/br|br/)>", re.IGNORECASE).sub("<br>", s)
 
 
 #=====================================================================================
@@ -911,12 +1117,101 @@ def ChangeNBSPToSpace(s: None | str) -> None | str | list[str]:
     return [c.replace("&nbsp;", " ").replace("&NBSP;", " ") for c in s]
 
 
+#=====================================================================================
+# HTML entity codec
+# Tables built once at import from the html.entities data, making the same choices bs4's EntitySubstitution makes,
+#   so that these give the same results as the bs4 calls HtmlHelpersPackage used to make -- but with str.translate()
+#   and a single regex pass instead of a parse tree per call.
+#     _htmlNameToChars:     reference name (no ";") -> the character(s) it stands for
+#     _htmlCharsToEntity:   character(s) -> "&name;", for everything that gets a named entity (including & < >)
+#     _htmlEntityTable:     the single-character part of _htmlCharsToEntity as a translate table
+#     _htmlEntityTails:     the second characters of the multi-character entities (e.g., U+0338 in "&nlE;")
+#     _htmlEntityRegex:     matches everything in _htmlCharsToEntity, the longest first
+def _BuildHtmlEntityTables() -> tuple[dict[str, str], dict[str, str], set[str], re.Pattern]:
+    nameToChars: dict[str, str]={}
+    charsToName: dict[str, str]={}
+    short: set[str]=set()
+    long: defaultdict[str, set[str]]=defaultdict(set)
+    for nameWithSemicolon, chars in sorted(html.entities.html5.items()):
+        name=nameWithSemicolon.removesuffix(";")
+        nameToChars.setdefault(name, chars)
+        charsToName[chars]=name
+        # Leave plain ASCII alone (but not < and >), and don't turn ASCII pairs like "fj" into entities
+        if len(chars) == 1 and ord(chars) < 128 and chars not in "<>":
+            continue
+        if len(chars) > 1 and chars.isascii():
+            continue
+        if len(chars) == 1:
+            short.add(chars)
+        else:
+            long[chars[0]].add(chars)
+    # Where HTML 4 has a name for a character, prefer it to the HTML5 alternatives
+    for codepoint, name in html.entities.codepoint2name.items():
+        charsToName[chr(codepoint)]=name
+
+    longs={chars for sequences in long.values() for chars in sequences}
+    entities={chars: f"&{charsToName[chars]};" for chars in short | longs | {"&"}}
+    tails={chars[1] for chars in longs}
+    particles=[re.escape(chars) for chars in sorted(longs, key=len, reverse=True)]
+    for c in short | {"&"}:
+        if long[c]:
+            particles.append(re.escape(c)+"(?!["+"".join(re.escape(x[1]) for x in long[c])+"])")   # c, unless it starts a longer entity
+        else:
+            particles.append(re.escape(c))
+    return nameToChars, entities, tails, Regex("|".join(particles))
+
+_htmlNameToChars, _htmlCharsToEntity, _htmlEntityTails, _htmlEntityRegex=_BuildHtmlEntityTables()
+_htmlEntityTable={ord(chars): entity for chars, entity in _htmlCharsToEntity.items() if len(chars) == 1}
+_htmlTextTable=str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_htmlAttributeTable=str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})     # As html.escape(quote=True)
+
+
+# Replace characters that have named HTML entities by those entities (é --> &eacute;, & --> &amp;)
+def UnicodeToHtmlEntities(s: str) -> str:
+    if not _htmlEntityTails.isdisjoint(s):
+        return _htmlEntityRegex.sub(lambda m: _htmlCharsToEntity[m.group(0)], s)
+    return s.translate(_htmlEntityTable)
+
+
+# Decode the character references in a run of HTML text, then re-escape & < > as an HTML serializer would -- i.e., what
+#   str(BeautifulSoup(s, "html.parser")).strip() gives for a string that is plain text.
+# Returns None if s contains markup or a malformed or unusual reference, which need a real HTML parser to get right.
+def DecodeHtmlText(s: str) -> str|None:
+    if "&" not in s and "<" not in s:
+        return s.replace(">", "&gt;").strip()
+    out: list[str]=[]
+    loc=0
+    # Match a complete character reference; something that looks like the start of one; markup; or a bare & < >
+    for m in Regex(r"&(?:#([0-9]+);|#[xX]([0-9a-fA-F]+);|([a-zA-Z][a-zA-Z0-9]*);)|(&[#a-zA-Z]|<[a-zA-Z/!?])|[&<>]").finditer(s):
+        out.append(s[loc:m.start()])
+        loc=m.end()
+        decimal, hexadecimal, name, other=m.groups()
+        if other is not None:
+            return None
+        if name is not None:
+            chars=_htmlNameToChars.get(name)
+            if chars is None:
+                return None
+        elif decimal is not None or hexadecimal is not None:
+            codepoint=int(decimal, 10) if decimal is not None else int(hexadecimal, 16)
+            # Only the ordinary cases: controls, surrogates, noncharacters and the like are left to the parser
+            if codepoint > 0x10FFFF or not (codepoint in (0x09, 0x0A) or 0x20 <= codepoint < 0x7F or 0xA0 <= codepoint < 0xD800
+                                          or 0xE000 <= codepoint < 0xFDD0 or codepoint > 0xFDEF and codepoint & 0xFFFE != 0xFFFE):
+                return None
+            chars=chr(codepoint)
+        else:
+            chars=m.group(0)
+        out.append(chars.translate(_htmlTextTable))
+    out.append(s[loc:])
+    return "".join(out).strip()
+
+
 #=====================================================================================
 # Convert the unicode of a str to a string which can be used in an HTML file
 def UnicodeToHtml(s: str) -> str:
     # Convert non-ASCII chars to XML character references and escape for HTML attribute context.
-    # escape() handles & → &amp; (required in href attributes); xmlcharrefreplace handles non-ASCII.
-    return escape(s).encode('ascii', 'xmlcharrefreplace').decode()
+    # The translate table escapes & → &amp; (required in href attributes) as html.escape() does; xmlcharrefreplace handles non-ASCII.
+    return s.translate(_htmlAttributeTable).encode('ascii', 'xmlcharrefreplace').decode()
 
 
 #=====================================================================================
@@ -1128,7 +1423,7 @@ def ArticleToFront(s: str) -> str:
 #=============================================================================
 # Sometime we need to construct a directory name by changing all the funny characters to underscores.
 def FanzineNameToDirName(s: str) -> str:       # MainWindow(MainFrame)
-    return re.sub("[^a-zA-Z0-9\\-]+", "_", RemoveArticles(s))
+    return Regex("[^a-zA-Z0-9\\-]+").sub("_", RemoveArticles(s))
 
 
 #=============================================================================
@@ -1641,7 +1936,7 @@ class ParmDict():
     # Take list of lines of the form xxx=yyy and add item yyy to key xxx
     def AppendLines(self, lines: list[str]) -> None:
         for line in lines:
-            m=re.match("^([a-zA-Z0-9_ ]+)=(.*)$", line)
+            m=Regex("^([a-zA-Z0-9_ ]+)=(.*)$").match(line)
             if m:
                 self[m.groups()[0].strip()]=m.groups()[1].strip()
 
@@ -1712,25 +2007,64 @@ def ReadListAsParmDict(filename: str, isFatal: bool=False, CaseInsensitiveCompar
 # OTOH, if it is found and does have a value, replace [yyy xxx] with yyy's value.
 # This lets you, for instance, replace [Convention Name] with "Confluence 2022"
 def ApplyParmDictToString(s: str, parms: ParmDict) -> str:
-    out: str=""
+    return CompileParmTemplate(s).Render(parms)
 
-    while len(s) > 0:
-        s1, val, s2=ParseFirstBracketedText(s, r"\[", "]")
-        if parms.Exists(val) and len(parms[val]) > 0:
-            out+=s1+parms[val]
-            s=s2
-            continue
-        # Look for the first token of val
-        if " " in val:
-            token1, token2=val.split(" ", 1)
-            if parms.Exists(token1) and len(parms[token1]) > 0:
-                out+=s1+token2
-                s=s2
-                continue
-        out+=s1+"["+val+"]"
-        s=s2
 
-    return out
+# =============================================================================
+# A text with [yyy xxx] placeholders (see ApplyParmDictToString), tokenized once into a list of segments so that it
+#   can be rendered against any number of ParmDicts in time linear in the output.
+# Each segment is (literal text, placeholder, first token of placeholder, rest of placeholder); the last segment's
+#   placeholder is None.  A placeholder is everything from a "[" up to the next "]", and is never empty.
+class ParmTemplate:
+    def __init__(self, s: str):
+        self._segments: list[tuple[str, str|None, str|None, str|None]]=[]
+        loc=0
+        while True:
+            bra=s.find("[", loc)
+            ket=s.find("]", bra+2) if bra >= 0 else -1
+            if ket < 0:
+                break
+            val=s[bra+1:ket]
+            token1, token2=val.split(" ", 1) if " " in val else (None, None)
+            self._segments.append((s[loc:bra], val, token1, token2))
+            loc=ket+1
+        self._segments.append((s[loc:], None, None, None))
+
+
+    def Render(self, parms: ParmDict) -> str:
+        out: list[str]=[]
+        for literal, val, token1, token2 in self._segments:
+            out.append(literal)
+            if val is None:
+                break
+            # A single lookup per name: ParmDict.GetItem() returns None when the name is absent
+            value=parms.GetItem(val)
+            if value is not None and len(value) > 0:
+                out.append(value)
+                continue
+            # Look for the first token of val
+            if token1 is not None:
+                value=parms.GetItem(token1)
+                if value is not None and len(value) > 0:
+                    out.append(token2)
+                    continue
+            out.append("["+val+"]")
+        return "".join(out)
+
+
+_parmTemplates: OrderedDict[str, ParmTemplate]=OrderedDict()
+_PARM_TEMPLATES_MAX=64
+
+# Get the compiled ParmTemplate for s, tokenizing it only the first time s is seen
+def CompileParmTemplate(s: str) -> ParmTemplate:
+    template=_parmTemplates.get(s)
+    if template is not None:
+        _parmTemplates.move_to_end(s)
+        return template
+    template=_parmTemplates[s]=ParmTemplate(s)
+    if len(_parmTemplates) > _PARM_TEMPLATES_MAX:
+        _parmTemplates.popitem(last=False)
+    return template
 
 
 # =============================================================================
@@ -1776,38 +2110,38 @@ def InterpretNumber(inputstring: str|None) -> None | int | float:
 
     # nn-nn (Hyphenated integers which usually means a range of numbers)
     # nnn + dash + nnn
-    m=re.match(r"^([0-9]+)\s*-\s*([0-9]+)$", inputstring)
+    m=Regex(r"^([0-9]+)\s*-\s*([0-9]+)$").match(inputstring)
     if m is not None and len(m.groups()) == 2:
         return int(m.groups()[0])        # We just sorta ignore n2...
 
     # nn.nn (Decimal number)
-    m=re.match("^([0-9]+.[0-9]+)$", inputstring)
+    m=Regex("^([0-9]+.[0-9]+)$").match(inputstring)
     if m is not None and len(m.groups()) == 1:
         return float(m.groups()[0])
 
     # .nn (Decimal number -- no leading digits)
-    m=re.match("^(.[0-9]+)$", inputstring)
+    m=Regex("^(.[0-9]+)$").match(inputstring)
     if m is not None and len(m.groups()) == 1:
         return float(m.groups()[0])
 
     # n 1/2, 1/4 in general, n a/b where a and b are single digit integers
-    m=re.match(r"^([0-9]+)\s+([0-9])/([0-9])$", inputstring)
+    m=Regex(r"^([0-9]+)\s+([0-9])/([0-9])$").match(inputstring)
     if m is not None:
         return int(m.groups()[0])+int(m.groups()[1])/int(m.groups()[2])
 
     # n 1/2, 1/4 in general, n a/b where a and b are single digit integers
-    m=re.match(r"^([0-9]+)\s+([0-9]+)/([0-9]+)$", inputstring)
+    m=Regex(r"^([0-9]+)\s+([0-9]+)/([0-9]+)$").match(inputstring)
     if m is not None:
         return int(m.groups()[0])+int(m.groups()[1])/int(m.groups()[2])
 
     # nnaa (integer followed by letter)
     # nnn + optional space + nnn
-    m=re.match(r"^([0-9]+)\s?([a-zA-Z]+)$", inputstring)
+    m=Regex(r"^([0-9]+)\s?([a-zA-Z]+)$").match(inputstring)
     if m is not None and len(m.groups()) == 2:
         return int(m.groups()[0])
     
     # roman numeral characters
-    m=re.match("^([IVXLC]+)$", inputstring)
+    m=Regex("^([IVXLC]+)$").match(inputstring)
     if m is not None and len(m.groups()) == 1:
         val=InterpretRoman(m.groups()[0])
         if val is not None:
@@ -1831,7 +2165,7 @@ def SortMessyNumber(inputstring: str) -> float:
         return -99999999
 
     # Locate any trailing alphabetic characters
-    m=re.match(r"^([0-9,.\-/ ]*)([a-zA-Z ]*)$", inputstring)
+    m=Regex(r"^([0-9,.\-/ ]*)([a-zA-Z ]*)$").match(inputstring)
     if m is None:
         # Confusing result. Sort last
         return 99999999
@@ -1980,22 +2314,149 @@ def FlattenTextForSorting(s: str, RemoveLeadingArticles: bool=False) -> str:
     return s
 
 
-def RemoveNonAlphanumericChars(s: str, LeaveSingleQuote: bool=False) -> str:
+# Batch forms of the above: normalize a whole column at once.
+# The column is joined with NULs (which the per-string versions would delete, so no string may contain one), pushed
+#   through casefold(), unidecode() and the translate table in one call each, and split apart again.
+def FlattenPersonsNameForSortingList(strs: list[str]) -> list[str]:
+    return _FlattenColumn([SortPersonsName(s.casefold(), IsLowerCaseOnly=True) for s in strs], LeaveSingleQuote=True)
 
-    out=""
-    for c in s:
-        if c.isalpha():
-            out+=c
-        elif c.isdigit():
-            out+=c
-        elif c == " ":
-            out+=c
-        elif c == "'" and LeaveSingleQuote:
-            out+=c
-        # Everything else is ignored
 
+def FlattenTextForSortingList(strs: list[str], RemoveLeadingArticles: bool=False) -> list[str]:
+    out=_FlattenColumn([s.casefold() for s in strs], LeaveSingleQuote=False)
+    if RemoveLeadingArticles:
+        out=[RemoveArticles(s) for s in out]
     return out
 
+
+def _FlattenColumn(strs: list[str], LeaveSingleQuote: bool) -> list[str]:
+    if len(strs) == 0:
+        return []
+    if any("\0" in s for s in strs):
+        return [RemoveNonAlphanumericChars(unidecode(s), LeaveSingleQuote=LeaveSingleQuote) for s in strs]
+    table=_keepAlphanumericAndQuoteColumn if LeaveSingleQuote else _keepAlphanumericColumn
+    return unidecode("\0".join(strs)).translate(table).split("\0")
+
+
+# A str.translate() table that keeps the characters RemoveNonAlphanumericChars() keeps -- letters, digits and spaces
+#   (and, optionally, single quotes) -- and deletes everything else.
+# It is filled in lazily: each character is classified the first time it is seen, and remembered.
+class _KeepCharsTable(dict):
+    def __init__(self, keep: str):
+        super().__init__()
+        for c in map(chr, range(128)):
+            self[ord(c)]=ord(c) if c.isalpha() or c.isdigit() or c in keep else None
+        self._keep=keep
+
+    def __missing__(self, codepoint: int) -> int|None:
+        c=chr(codepoint)
+        val=self[codepoint]=codepoint if c.isalpha() or c.isdigit() or c in self._keep else None
+        return val
+
+_keepAlphanumeric=_KeepCharsTable(" ")
+_keepAlphanumericAndQuote=_KeepCharsTable(" '")
+_keepAlphanumericColumn=_KeepCharsTable(" \0")             # The column separator used by _FlattenColumn() survives
+_keepAlphanumericAndQuoteColumn=_KeepCharsTable(" '\0")
+
+
+# Remove everything but letters, digits and spaces (and, if LeaveSingleQuote, single quotes)
+def RemoveNonAlphanumericChars(s: str, LeaveSingleQuote: bool=False) -> str:
+    return s.translate(_keepAlphanumericAndQuote if LeaveSingleQuote else _keepAlphanumeric)
+
+
+def RemoveNonAlphanumericCharsList(strs: list[str], LeaveSingleQuote: bool=False) -> list[str]:
+    table=_keepAlphanumericAndQuote if LeaveSingleQuote else _keepAlphanumeric
+    return [s.translate(table) for s in strs]
+
+
+# ==========================================================
+# Precomputed sort keys
+# The sort-key functions (SortTitle, SortPersonsName, FlattenPersonsNameForSorting, FlattenTextForSorting,
+#   RemoveArticles, ArticleToEnd, SortMessyNumber, ...) recompute their key on every call, and we re-sort the same
+#   lists many times per build.  SortKey(fn) wraps a key function with a cache keyed by the input string, so each
+#   distinct string's key is computed once per run and every later sort costs only the comparisons:
+#       titles.sort(key=SortKey(SortTitle))
+#       rows=SortRows(rows, [(0, SortTitle), (3, SortMessyNumber, True)])
+# Caches are per key function, so pass the function itself (not a new lambda each time).
+_SORT_KEY_CACHE_MAX=250000      # Entries per key function; a cache that fills up is simply emptied and refilled
+
+
+class CachedSortKey:
+    def __init__(self, fn: Callable[[Any], Any], batch: Callable[[list], list]|None=None):
+        self._fn=fn
+        self._batch=batch       # A list-in, list-out form of fn, used to compute a column's missing keys in one go
+        self._cache: dict[Any, Any]={}
+
+    def __call__(self, val: Any) -> Any:
+        key=self._cache.get(val, self)      # (self is the "not there" marker, since a key may legitimately be None)
+        if key is self:
+            if len(self._cache) >= _SORT_KEY_CACHE_MAX:
+                self._cache.clear()
+            key=self._cache[val]=self._fn(val)
+        return key
+
+    # The keys for a whole column of values
+    def Column(self, vals: list) -> list:
+        cache=self._cache
+        if self._batch is not None:
+            missing=list({v for v in vals if v not in cache})
+            if missing:
+                if len(cache)+len(missing) > _SORT_KEY_CACHE_MAX:
+                    cache.clear()
+                    missing=list(set(vals))
+                cache.update(zip(missing, self._batch(missing)))
+            return [cache[v] for v in vals]
+        return [self(v) for v in vals]
+
+    def Clear(self) -> None:
+        self._cache.clear()
+
+
+_sortKeys: dict[Callable, CachedSortKey]={}
+_sortKeyBatchForms: dict[Callable, Callable]={FlattenTextForSorting: FlattenTextForSortingList,
+                                              FlattenPersonsNameForSorting: FlattenPersonsNameForSortingList,
+                                              RemoveNonAlphanumericChars: RemoveNonAlphanumericCharsList}
+
+
+# Get the caching version of the sort-key function fn
+def SortKey(fn: Callable[[Any], Any]) -> CachedSortKey:
+    if isinstance(fn, CachedSortKey):
+        return fn
+    cached=_sortKeys.get(fn)
+    if cached is None:
+        cached=_sortKeys[fn]=CachedSortKey(fn, _sortKeyBatchForms.get(fn))
+    return cached
+
+
+def ClearSortKeyCaches() -> None:
+    for cached in _sortKeys.values():
+        cached.Clear()
+
+
+# Sort rows (lists, tuples, dicts...) on one or more columns, most significant first.
+# spec is a list of (column, keyfn) or (column, keyfn, reverse) where column is anything that can index a row (or a
+#   function which takes a row and returns the value) and keyfn is a sort-key function such as SortTitle (or None to
+#   sort on the raw values).  Returns a new list; the sort is stable.
+def SortRows(rows: list, spec: list[tuple]) -> list:
+    columns=[]
+    for item in spec:
+        column, keyfn=item[0], item[1]
+        reverse=len(item) > 2 and item[2]
+        vals=[column(row) for row in rows] if callable(column) else [row[column] for row in rows]
+        columns.append((vals if keyfn is None else SortKey(keyfn).Column(vals), reverse))
+
+    if len(columns) == 0:
+        return list(rows)
+    order=list(range(len(rows)))
+    if len({reverse for _, reverse in columns}) == 1:
+        # All one direction: a single sort on composite keys
+        composite=list(zip(*[keys for keys, _ in columns]))
+        order.sort(key=composite.__getitem__, reverse=columns[0][1])
+    else:
+        # Mixed directions: stable sorts from the least significant column to the most
+        for keys, reverse in reversed(columns):
+            order.sort(key=keys.__getitem__, reverse=reverse)
+    return [rows[i] for i in order]
+
 # ==========================================================
 # Handle lists of names
 def UnscrambleListOfNames(input: str) -> list[str]:
@@ -2033,7 +2494,7 @@ def UnscrambleListOfNames(input: str) -> list[str]:
             return [name]   # Return a list of the one name
 
     # Now deal with a list of names
-    names=re.split(", and |, |/| and|&", input)       # delimiters=[", ", "/", " and ", ", and",  "&"]
+    names=Regex(", and |, |/| and|&").split(input)       # delimiters=[", ", "/", " and ", ", and",  "&"]
     names=[UnhidePrefixsAndSuffixes(x.strip()) for x in names]
     # if needsEncoding:
     #     names=[UnicodeToHtml2(x) for x in names]
@@ -2055,7 +2516,7 @@ def SplitListOfNamesOnPattern(s: str, pattern: str) -> list[str]:
     # We can now be pretty confident that any remaining commas are separators.
     # Use the pattern to split the string
     # an example of a pattern is:   r", and |,|/|;|and |&|\n|<br>"
-    names=re.split(pattern, s)       # delimiters=[", ", "/", " and ", ", and",  "&"]
+    names=TagRegex(pattern).split(s)       # delimiters=[", ", "/", " and ", ", and",  "&"]
     names=[UnhidePrefixsAndSuffixes(x.strip()) for x in names]
     names=list(filter(None, names))     # Drop emtry strings from list
     # In certain cases (e.g., the name "Del Coger") the first name is interpreted as a prefix and is left with a trailing '_'.  Turn it into a space
@@ -2088,13 +2549,13 @@ def RemoveEmptyRowsFromMatrix(m: list[list[str]]) -> list[list[str]]:
 #       Capture group 1
 #       Capture group 2
 def Match2AndRemove(inputstr: str, pattern: str) -> tuple[str, str|None, str|None]:
-    m=re.match(pattern, inputstr)         # Do we match the pattern?
+    m=TagRegex(pattern).match(inputstr)         # Do we match the pattern?
     if m is not None and len(m.groups()) > 0:
         g0=m.groups()[0]                    # There may be either 1 or two groups, but we need to return two matches
         g1=None
         if len(m.groups()) > 1:
             g1=m.groups()[1]
-        return re.sub(pattern, "", inputstr), g0, g1  # And delete the matched text
+        return TagRegex(pattern).sub("", inputstr), g0, g1  # And delete the matched text
     return inputstr, None, None
 
 
@@ -2194,7 +2655,7 @@ def WikidotCanonicizeName(name: str) -> str:
     elif len(name) == 1:
         return name.upper()
     name=name[0].upper()+name[1:].lower()
-    name=re.sub("[^a-zA-Z0-9]+", "-", name)
+    name=Regex("[^a-zA-Z0-9]+").sub("-", name)
     # Wikidot does not start or end URLs with hyphens
     if name[0] == "-" and len(name) > 1:
         name=name[1:]
@@ -2289,11 +2750,11 @@ def WikiLinkSplit(s: str) -> tuple[str, str, str]:
     link=""
     anchor=""
     text=""
-    m=re.match(r"(?:\[\[)?"
-               r"([^|#\]]+)"
-               r"(#[^|\]]*)*"
-               r"(\|[^]]*)*"
-               r"(?:]])?", s)
+    m=Regex(r"(?:\[\[)?"
+            r"([^|#\]]+)"
+            r"(#[^|\]]*)*"
+            r"(\|[^]]*)*"
+            r"(?:]])?").match(s)
     # Optional "[["
     # A string not containing "#", "|" or "]" (the link)
     # An optional string beginning with "#" and not containing "|" or "]" (the anchor)
@@ -2340,13 +2801,13 @@ def WikiExtractLink(s: str) -> str:
 #-----------------------------------------------------------------
 # Split a string into a list of string.  The split is done on *spans* of the input characters.
 def SplitOnSpan(chars: str, s: str) -> list[str]:
-    pattern=re.compile(rf"[{chars}]")
+    pattern=TagRegex(rf"[{chars}]")
     # replace the matched span of <chars> with a single char from the span string
-    return [x for x in re.sub(pattern, chars[0], s).split(chars[0]) if len(x) > 0]
+    return [x for x in pattern.sub(chars[0], s).split(chars[0]) if len(x) > 0]
 
 
 def SplitOnAnySingleChar(chars: str, s: str) -> list[str]:
-    return re.split(rf"[{chars}]+", s)
+    return TagRegex(rf"[{chars}]+").split(s)
 
 
 #------------------------------------------------------------------
@@ -2365,10 +2826,10 @@ def SplitOutput(f, s: str):
 # Split a string based on spans of <br>, </br>, <br/>, /n, \n
 def SplitOnSpansOfLineBreaks(s: str) -> list[str]:
     # Turn spans of /n or \n into a single <br>
-    s=re.sub(r"([\\/]n)+", "<br>", s)
+    s=Regex(r"([\\/]n)+").sub("<br>", s)
 
     # Split on <br> in all its forms
-    ss=re.split(r"</?br/?>", s, flags=re.IGNORECASE)
+    ss=Regex(r"</?br/?>", re.IGNORECASE).split(s)
 
     # Trim leading and trailing spaces, drop empty members
     ss=[x.strip() for x in ss if len(x.strip()) > 0]
@@ -2399,7 +2860,7 @@ def ExtractTrailingSequenceNumber(s: str, complete: bool = False, IgnoreRomanNum
     # # Leading junk
     # Vnnn + optional whitespace
     # #nnn + optional single alphabetic character suffix
-    m=re.match(r"^(.*?)V(\d+)\s*#(\d+)(\w?)$", s)
+    m=Regex(r"^(.*?)V(\d+)\s*#(\d+)(\w?)$").match(s)
     if m is not None and len(m.groups()) in [3, 4]:
         ns=""
         if len(m.groups()) == 4:
@@ -2409,7 +2870,7 @@ def ExtractTrailingSequenceNumber(s: str, complete: bool = False, IgnoreRomanNum
     #
     #  Vol (or VOL) + optional space + nnn + optional comma + optional space
     # + #nnn + optional single alphabetic character suffix
-    m=re.match(r"^(.*?)V[oO][lL]\s*(\d+)\s*#(\d+)(\w?)$", s)
+    m=Regex(r"^(.*?)V[oO][lL]\s*(\d+)\s*#(\d+)(\w?)$").match(s)
     if m is not None and len(m.groups()) in [3, 4]:
         ns=None
         if len(m.groups()) == 4:
@@ -2418,46 +2879,46 @@ def ExtractTrailingSequenceNumber(s: str, complete: bool = False, IgnoreRomanNum
 
     # Now look for nnn nnn/nnn (fractions!)
     # nnn + mandatory whitespace + nnn + slash + nnn * optional whitespace
-    m=re.match(r"^(.*?)(\d+)\s+(\d+)/(\d+)$", s)
+    m=Regex(r"^(.*?)(\d+)\s+(\d+)/(\d+)$").match(s)
     if m is not None and len(m.groups()) == 4:
         return m.groups()[0].strip(), "", m.groups()[1]+" "+m.groups()[2]+"/"+m.groups()[3], ""
 
     # Now look for nnn/nnn (which is understood as vol/num
     # Leading stuff + nnn + slash + nnn * optional whitespace
-    m=re.match(r"^(.*?)(\d+)/(\d+)$", s)
+    m=Regex(r"^(.*?)(\d+)/(\d+)$").match(s)
     if m is not None and len(m.groups()) == 3:
         return m.groups()[0].strip(), m.groups()[1], m.groups()[2], ""
 
     # Now look for xxx, where xxx is in Roman numerals
     # Leading whitespace + roman numeral characters + whitespace
     if not IgnoreRomanNumerals:
-        m=re.match(r"^(.*?)([IVXLC]+)$", s)  # TODO: the regex detects more than just Roman numerals.  We need to bail out of this branch if that happens and not return
+        m=Regex(r"^(.*?)([IVXLC]+)$").match(s)  # TODO: the regex detects more than just Roman numerals.  We need to bail out of this branch if that happens and not return
         if m is not None and len(m.groups()) == 2:
             return m.groups()[0].strip(), "", str(InterpretRoman(m.groups()[1])), ""
 
     # Next look for nnn-nnn (which is a range of issue numbers; only the start is returned)
     # Leading stuff + nnn + dash + nnn
-    m=re.match(r"^(.*?)(\d+)-(\d+)$", s)
+    m=Regex(r"^(.*?)(\d+)-(\d+)$").match(s)
     if m is not None and len(m.groups()) == 3:
         return m.groups()[0].strip(), "", m.groups()[1], ""
 
     # Next look for #nnn
     # Leading stuff + nnn
-    m=re.match(r"^(.*?)#(\d+)$", s)
+    m=Regex(r"^(.*?)#(\d+)$").match(s)
     if m is not None and len(m.groups()) == 2:
         return m.groups()[0].strip(), "", m.groups()[1], ""
 
     # Now look for a trailing decimal number
     # Leading characters + single non-digit + nnn + dot + nnn + whitespace
     # the ? makes * a non-greedy quantifier
-    m=re.match(r"^(.*?)(\d+\.\d+)$", s)
+    m=Regex(r"^(.*?)(\d+\.\d+)$").match(s)
     if m is not None and len(m.groups()) == 2:
         return m.groups()[0].strip(), "", m.groups()[1], ""
 
     if not complete:
         # Now look for a single trailing number
         # Leading stuff + nnn + optional single alphabetic character suffix + whitespace
-        m=re.match(r"^(.*?)([0-9]+)([a-zA-Z]?)\s*$", s)
+        m=Regex(r"^(.*?)([0-9]+)([a-zA-Z]?)\s*$").match(s)
         if m is not None and len(m.groups()) in [2, 3]:
             ws=""
             if len(m.groups()) == 3:
@@ -2467,7 +2928,7 @@ def ExtractTrailingSequenceNumber(s: str, complete: bool = False, IgnoreRomanNum
         # Now look for trailing Roman numerals
         # Leading stuff + mandatory whitespace + roman numeral characters + optional trailing whitespace
         if not IgnoreRomanNumerals:
-            m=re.match(r"^(.*?)\s+([IVXLC]+)\s*$", s)
+            m=Regex(r"^(.*?)\s+([IVXLC]+)\s*$").match(s)
             if m is not None and len(m.groups()) == 2:
                 return m.groups()[0].strip(), "", str(InterpretRoman(m.groups()[1])), ""
 
@@ -2483,7 +2944,7 @@ def DropTrailingSequenceNumber(s: str) -> str:
         return val[1]
 
     # Now look for a single trailing decimal number, possibly preceded by a #
-    m=re.match(r"^\s*(.*?)( #)?(\d+)\s*$", s)
+    m=Regex(r"^\s*(.*?)( #)?(\d+)\s*$").match(s)
     if m is not None and len(m.groups()) >= 2:
         return m.groups()[0].strip()
 
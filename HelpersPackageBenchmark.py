@@ -0,0 +1,85 @@
+import sys
+import time
+import argparse
+import statistics
+
+import HelpersPackage
+
+
+# =============================================================================
+# Scaling benchmarks for the HelpersPackage text helpers
+#
+# Builds synthetic HTML of growing size and times each helper on it. A helper that is linear in its input
+# shows a roughly constant time per item as the size doubles; a quadratic one shows the time per item doubling
+# too. Each size is timed as the median of --repeat runs.
+#
+#   python HelpersPackageBenchmark.py [--sizes 500 1000 2000 4000 8000] [--repeat 3]
+
+SIZES = [500, 1000, 2000, 4000, 8000]
+
+
+# A table of `rows` rows of three cells each -- the shape of a fanac.org fanzine index page.
+def _table_html(rows: int) -> str:
+    body = "".join(f"<tr><td>Issue {i}</td><td>{1950 + i % 50}</td><td><b>Editor {i}</b></td></tr>\n" for i in range(rows))
+    return f"<html><body><table>\n{body}</table></body></html>"
+
+
+def _search_and_replace(html: str) -> None:
+    HelpersPackage.SearchAndReplace(r"(<b>.*?</b>)", html, "", numGroups=1, caseinsensitive=True, ignorenewlines=True)
+
+
+def _extract_all_cells(html: str) -> None:
+    HelpersPackage.SearchExtractAndRemoveBoundedAll(html, r"(<td)(.*?)(</td>)")
+
+
+BENCHMARKS = {
+    "SearchAndReplace":                 _search_and_replace,
+    "SearchExtractAndRemoveBoundedAll": _extract_all_cells,
+}
+
+
+def _time(fn, arg, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+# Returns {benchmark name: [(size, seconds), ...]}
+def RunScalingBenchmarks(sizes: list[int]|None=None, repeat: int=3, names: list[str]|None=None) -> dict[str, list[tuple[int, float]]]:
+    sizes = sizes or SIZES
+    results = {}
+    for name in names or BENCHMARKS:
+        fn = BENCHMARKS[name]
+        rows = []
+        for size in sizes:
+            seconds = _time(fn, _table_html(size), repeat)
+            rows.append((size, seconds))
+            print(f"{name:<34} {size:>7} rows {seconds*1000:10.2f} ms  {seconds/size*1e6:8.2f} us/row", flush=True)
+        results[name] = rows
+    return results
+
+
+# The ratio of time-per-item at the largest size to that at the smallest: ~1 for linear, ~largest/smallest for quadratic.
+def ScalingRatio(rows: list[tuple[int, float]]) -> float:
+    (n0, t0), (n1, t1) = rows[0], rows[-1]
+    return (t1 / n1) / (t0 / n0) if t0 > 0 else float("inf")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Check that the HelpersPackage text helpers scale linearly.")
+    ap.add_argument("--sizes", nargs="*", type=int, default=SIZES, help="input sizes in table rows (default: %(default)s)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per size (median is reported)")
+    ap.add_argument("--names", nargs="*", choices=list(BENCHMARKS), help="benchmarks to run (default: all)")
+    ap.add_argument("--max-ratio", type=float, default=2.0, help="fail if time per row grows by more than this factor")
+    args = ap.parse_args()
+
+    results = RunScalingBenchmarks(args.sizes, args.repeat, args.names)
+    worst = 0.0
+    for name, rows in results.items():
+        ratio = ScalingRatio(rows)
+        worst = max(worst, ratio)
+        print(f"{name}: time per row x{ratio:.2f} from {rows[0][0]} to {rows[-1][0]} rows")
+    sys.exit(1 if worst > args.max_ratio else 0)
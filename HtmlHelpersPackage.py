@@ -3,15 +3,22 @@ import warnings
 import bs4
 from bs4 import MarkupResemblesLocatorWarning
 
+from HelpersPackage import DecodeHtmlText, UnicodeToHtmlEntities
+
 #=====================================================================================
+# These give the same results as a BeautifulSoup round trip and bs4's EntitySubstitution, but use the precomputed
+# entity tables in HelpersPackage.  Only strings containing markup (or malformed references) still go through bs4.
 def HtmlEscapesToUnicode(s: str, isURL: bool=False) -> str:
     if isURL:
         s=s.replace("%23", "#").replace( "%26", "&").replace( "%20", " ")
-    # This helper is routinely called on short URL/filename strings, which BeautifulSoup mistakes for
-    # filenames and warns about. The parse is fine; the warning is spurious, so suppress it for this call only.
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", category=MarkupResemblesLocatorWarning)
-        s=str(bs4.BeautifulSoup(s, features="html.parser")).strip()
+    decoded=DecodeHtmlText(s)
+    if decoded is None:
+        # Markup: let BeautifulSoup parse it.  Short strings that look like filenames make it warn; the parse is fine
+        # and the warning is spurious, so suppress it for this call only.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=MarkupResemblesLocatorWarning)
+            decoded=str(bs4.BeautifulSoup(s, features="html.parser")).strip()
+    s=decoded
     if isURL:
         s=s.replace("%23", "#").replace( "%26", "&").replace( "%20", " ")
     return s
@@ -19,11 +26,20 @@ def HtmlEscapesToUnicode(s: str, isURL: bool=False) -> str:
 def UnicodeToHtmlEscapes(s: str, isURL: bool=False) -> str:
     if isURL:
         s=s.replace("#", "%23").replace("&", "%26").replace( " ", "%20")
-    s=bs4.dammit.EntitySubstitution.substitute_html(s)
+    s=UnicodeToHtmlEntities(s)
     if isURL:
         s=s.replace("#", "%23").replace("&", "%26").replace( " ", "%20")
     return s
 
+# List-in, list-out forms of the above
+def HtmlEscapesToUnicodeList(strs: list[str], isURL: bool=False) -> list[str]:
+    return [HtmlEscapesToUnicode(s, isURL=isURL) for s in strs]
+
+def UnicodeToHtmlEscapesList(strs: list[str], isURL: bool=False) -> list[str]:
+    if isURL:
+        return [UnicodeToHtmlEscapes(s, isURL=True) for s in strs]
+    return [UnicodeToHtmlEntities(s) for s in strs]
+
 #=====================================================================================
 def ConvertHTMLEscapes(s: str) -> str:
     s=s.replace("&amp;", "&")
@@ -1,19 +1,50 @@
+import gc
+import asyncio
+import contextlib
+import functools
+import itertools
 import io
 import os
+import hashlib
 import re
+import json
 import time
+import random
+import threading
+import shutil
+import string
+import struct
 from enum import IntEnum
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from pypdf import PdfReader
+from pypdf.generic import IndirectObject, StreamObject
 
 from HelpersPackage import ExtensionMatches
 from Log import Log, LogError
 
 try:
     from spellchecker import SpellChecker as _SpellChecker
-    _spell = _SpellChecker()
 except ImportError:
-    _spell = None
+    _SpellChecker = None
+
+# MuPDF can no longer linearize, so linearize=True (see the save policy) hands the saved file to qpdf.
+try:
+    import pikepdf as _pikepdf
+except ImportError:
+    _pikepdf = None
+
+# The lexicon LowQualityScan checks words against: a SpellChecker, built on first use (tens of MB and
+# seconds of startup), or a SharedLexicon attached by a worker process -- see the OCR lexicon section.
+_spell = None
+
+
+def _get_spell():
+    global _spell
+    if _spell is None and _SpellChecker is not None:
+        _spell = _SpellChecker()
+    return _spell
 
 
 # =============================================================================
@@ -54,6 +85,7 @@ class OcrQuality(IntEnum):
 #                             to recognized words (in the busiest pages) for HIGH
 #   top_page_count         — how many of the largest-text pages to examine for
 #                             the HIGH quality test
+#   streaming              — bound memory on long documents (see _stream_pages)
 #
 # Returns:
 #   OcrQuality.NOT_OCRED  — no page has >= min_good_words_per_page good words
@@ -64,15 +96,17 @@ def LowQualityScan(reader: PdfReader,
                    min_word_length: int = 5,
                    min_good_words_per_page: int = 20,
                    high_quality_ratio: float = 0.75,
-                   top_page_count: int = 2) -> tuple[OcrQuality, dict]:
+                   top_page_count: int = 2,
+                   streaming: bool = False) -> tuple[OcrQuality, dict]:
     """Return (quality, stats) where stats has keys: alpha, in_words, ratio, long_words."""
 
     prefix = f"LowQualityScan({label})" if label else "LowQualityScan"
-    if _spell is None:
+    spell = _get_spell()
+    if spell is None:
         Log(f"{prefix}: WARNING — pyspellchecker not available; ratio test will be skipped, quality capped at LOW")
     page_data = []   # (total_text_len, total_alpha_chars, good_long_word_count, recognized_chars)
 
-    for i, page in enumerate(reader.pages):
+    for i, page in enumerate(_stream_pages(reader) if streaming else reader.pages):
         try:
             text = page.extract_text() or ""
         except Exception:
@@ -80,9 +114,9 @@ def LowQualityScan(reader: PdfReader,
 
         words = re.findall(r'[a-zA-Z]+', text)
 
-        if _spell is not None and words:
+        if spell is not None and words:
             lower_words = [w.lower() for w in words]
-            unknown     = _spell.unknown(lower_words)
+            unknown     = spell.unknown(lower_words)
             good_long   = sum(1   for w in words if len(w) > min_word_length and w.lower() not in unknown)
             recog_chars = sum(len(w) for w in words if w.lower() not in unknown)
         else:
@@ -92,7 +126,7 @@ def LowQualityScan(reader: PdfReader,
 
         total_alpha = sum(len(w) for w in words)
         page_data.append((len(text), total_alpha, good_long, recog_chars))
-        if _spell is None:
+        if spell is None:
             Log(f"{prefix} p{i+1}: alpha count={total_alpha}  # in words=n/a  ratio=n/a  # words>5 char={good_long}")
         else:
             ratio_str = f"{recog_chars/total_alpha:.2f}" if total_alpha > 0 else "n/a"
@@ -106,7 +140,7 @@ def LowQualityScan(reader: PdfReader,
     total_recog_all = sum(p[3] for p in page_data)
     max_long_words  = max((p[2] for p in page_data), default=0)
     agg_ratio       = (total_recog_all / total_alpha_all
-                       if _spell is not None and total_alpha_all > 0 else None)
+                       if spell is not None and total_alpha_all > 0 else None)
     stats = {
         'alpha':      total_alpha_all,
         'in_words':   total_recog_all,
@@ -128,7 +162,7 @@ def LowQualityScan(reader: PdfReader,
 
     # HIGH: in the top N pages by raw text volume, enough chars are recognized.
     # Requires spell-checker; without it we can only confirm OCR is present, not that it is high quality.
-    if _spell is None:
+    if spell is None:
         Log(f"{prefix}: spell checker unavailable — LOW")
         return OcrQuality.LOW, stats
 
@@ -146,13 +180,434 @@ def LowQualityScan(reader: PdfReader,
     return OcrQuality.LOW, stats
 
 
+# =============================================================================
+# Lock-aware retry shared by the PDF writers (and anything else that opens or swaps files on Windows)
+#
+# A just-written file can be transiently locked on Windows (antivirus scanning %TEMP%, the indexer, a
+# viewer), which surfaces as PermissionError on open or os.replace. RetryWithBackoff calls fn() until it
+# succeeds, retrying the exception types in retry_on with exponential backoff (_RETRY_FIRST_DELAY doubling
+# up to _RETRY_MAX_DELAY, each wait jittered to 50-100% so parallel workers don't retry in lock-step) until
+# `deadline` seconds have passed; then it re-raises the last exception. A short lock thus costs a few tens
+# of milliseconds rather than a fixed 0.25 s step, and a long one is waited out for longer.
+# RetryStats() returns counters for this process: calls, retries, ms spent waiting, and how many gave up.
+_RETRY_FIRST_DELAY = 0.02     # seconds before the first retry
+_RETRY_MAX_DELAY   = 1.0      # cap on any single wait
+_RETRY_DEADLINE    = 10.0     # total seconds to keep retrying one operation
+_retry_stats = {"calls": 0, "retries": 0, "wait_ms": 0.0, "gave_up": 0}
+
+
+def RetryStats() -> dict:
+    return dict(_retry_stats)
+
+
+# The asyncio facade (see the end of this module) does its waiting on the event loop instead: in its worker
+# it sets _retry_local.mode to "defer", which makes a retryable failure raise _RetryLater at once, carrying
+# `resume` -- a picklable description of how to carry on (None: run the whole operation again). Mode "once"
+# means a single attempt and then the usual give-up handling.
+_retry_local = threading.local()
+
+
+class _RetryLater(Exception):
+    def __init__(self, resume):
+        super().__init__("retry later")
+        self.resume = resume
+
+
+def RetryWithBackoff(fn, retry_on: type|tuple=PermissionError, deadline: float=_RETRY_DEADLINE, resume=None):
+    _retry_stats["calls"] += 1
+    mode  = getattr(_retry_local, "mode", None)
+    start = time.monotonic()
+    delay = _RETRY_FIRST_DELAY
+    while True:
+        try:
+            return fn()
+        except retry_on:
+            if mode == "defer":
+                raise _RetryLater(resume)
+            remaining = (0 if mode == "once" else deadline) - (time.monotonic() - start)
+            if remaining <= 0:
+                _retry_stats["gave_up"] += 1
+                raise
+            wait = min(delay * random.uniform(0.5, 1.0), remaining)
+            time.sleep(wait)
+            _retry_stats["retries"] += 1
+            _retry_stats["wait_ms"] += wait * 1000
+            delay = min(delay * 2, _RETRY_MAX_DELAY)
+
+
+# Swap the freshly written tmp_out in for dst (atomically, via os.replace), waiting out transient locks.
+# If dst stays locked past the deadline, log it, delete tmp_out and return False (dst is left unchanged).
+def ReplaceFileWithRetry(tmp_out: str, dst: str, caller: str="ReplaceFileWithRetry") -> bool:
+    try:
+        RetryWithBackoff(lambda: os.replace(tmp_out, dst), resume=("replace", tmp_out, dst, caller))
+        return True
+    except PermissionError:
+        LogError(f"{caller}: could not replace '{dst}' with the updated copy (locked)")
+        try:
+            os.remove(tmp_out)
+        except Exception:
+            pass
+        return False
+
+
+# =============================================================================
+# Local scratch staging for compact rewrites
+#
+# By default a compact save is written next to the original (pdf_path + ".min.pdf") and renamed over it.
+# When the archive sits on a network share, that means MuPDF's whole save -- with all its seeking and
+# small writes -- goes over the network. SetPdfScratchDir(dir) makes the writers save to `dir` (fast local
+# disk) instead; the finished file is then copied to the share in one streamed copy, checked, and renamed
+# into place there exactly as before, so the lock handling on the share is unchanged.
+# SetPdfScratchDir(None) restores writing next to the original.
+_scratch_dir: str|None = None
+
+
+def SetPdfScratchDir(scratch_dir: str|None) -> None:
+    global _scratch_dir
+    if scratch_dir is not None:
+        os.makedirs(scratch_dir, exist_ok=True)
+    _scratch_dir = scratch_dir
+
+
+def _tmp_path(dst: str) -> str:
+    """Where a compact rewrite of dst is written: next to it, or in the scratch dir if one is set."""
+    if _scratch_dir is None:
+        return dst + ".min.pdf"
+    tag = hashlib.blake2b(os.path.abspath(dst).encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(_scratch_dir, f"{os.getpid()}-{tag}-{os.path.basename(dst)}.min.pdf")
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception:
+        pass
+
+
+# Finish a _save_doc: swap in the compact copy, or (after an in-place incremental save) discard any
+# partial compact file. The document must already be closed. Returns False only if the swap failed.
+def _finish_save(tmp_out: str, dst: str, saved_compact: bool, caller: str) -> bool:
+    if _handle_pool is not None:
+        _handle_pool.Evict(dst)         # nothing may hold dst open (or cache its old contents) past here
+    if not saved_compact:
+        _remove_quietly(tmp_out)
+        return True
+    beside = dst + ".min.pdf"
+    if tmp_out != beside:
+        # Staged on local scratch: stream it to the share next to dst, verify, then rename as usual.
+        try:
+            shutil.copyfile(tmp_out, beside)
+            if os.path.getsize(beside) != os.path.getsize(tmp_out):
+                raise OSError(f"copy is {os.path.getsize(beside)} bytes, expected {os.path.getsize(tmp_out)}")
+        except Exception as e:
+            LogError(f"{caller}: could not copy the updated '{dst}' from scratch to its folder: {e}")
+            _remove_quietly(beside)
+            return False
+        finally:
+            _remove_quietly(tmp_out)
+    return ReplaceFileWithRetry(beside, dst, caller)
+
+
+# =============================================================================
+# Memory-bounded page iteration for LowQualityScan(streaming=True).
+#
+# A PdfReader caches every object it resolves (reader.resolved_objects): content streams, decoded fonts,
+# images, resource dicts. Iterating reader.pages therefore keeps every page's parse alive, and a 1000-page
+# compilation climbs to gigabytes. _stream_pages yields the pages one at a time and, after each page has
+# been scored, evicts from the cache the objects that page alone needed -- its content streams and private
+# images. What later pages would only have to decode again stays:
+#   - the catalog and page tree, resolved up front;
+#   - compressed object streams (/ObjStm) and every object unpacked from one. pypdf unpacks a whole object
+#     stream at once, so evicting them would re-inflate and re-parse it for every page; and since a stream
+#     can never live in an object stream, these are all small dicts and arrays;
+#   - the page's fonts (with their /ToUnicode maps and widths), which are nearly always shared;
+#   - content streams and XObjects, once a second page has used the same one (a repeated logo, page
+#     frame or header).
+# After each page a young-generation collection (gc.collect(1)) reclaims the parent/child cycles pypdf
+# objects form; the page's objects are still young, so a full collection -- which also walks everything
+# kept -- buys nothing more and cost ~1 ms a page.
+# Peak memory target: the open reader (xref table + page tree, a few MB even for 1000 pages) plus the parse
+# of the single heaviest page and the shared objects above -- independent of page count. Size worker pools
+# on the heaviest page, not on the longest document.
+# The price is the bookkeeping above, ~0.3 ms a page, against the ~40 ms pypdf takes to extract a page's
+# text. Object streams are unpacked once, exactly as without streaming. Measured over 300 distinct text pages
+# in object streams (extract_text on each page): peak Python heap 5.45 MB without streaming, 1.23 MB with;
+# the streaming walk itself took 0.13 s of the ~12 s total. Wall-clock runs of PDFHelpersBenchmark on the
+# same machine varied by more than that from one run to the next.
+
+
+def _keep_reachable(cache: dict, keep: set, obj) -> None:
+    # Add to keep every cached object reachable from obj, following only references that are already
+    # resolved -- this never makes the reader parse anything new.
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, IndirectObject):
+            key = (o.generation, o.idnum)
+            if key not in keep and key in cache:
+                keep.add(key)
+                stack.append(cache[key])
+        elif isinstance(o, dict):
+            stack.extend(dict.values(o))        # the raw values: DictionaryObject resolves on lookup
+        elif isinstance(o, list):
+            stack.extend(o)
+
+
+def _keep_ref(cache: dict, keep: set, ref):
+    # Keep the cached object `ref` points to (but nothing it refers to) and return it, or None if not cached
+    key = (ref.generation, ref.idnum)
+    if key not in cache:
+        return None
+    keep.add(key)
+    return cache[key]
+
+
+def _keep_shared(cache: dict, keep: set, page, seen: set) -> None:
+    # Add the page's fonts, and any content stream or XObject an earlier page also used, to keep
+    contents = dict.get(page, "/Contents")
+    _keep_if_seen(cache, keep, contents if isinstance(contents, list) else [contents], seen)
+    res = dict.get(page, "/Resources")
+    if isinstance(res, IndirectObject):
+        res = _keep_ref(cache, keep, res)
+    if not isinstance(res, dict):
+        return
+    _keep_reachable(cache, keep, dict.get(res, "/Font"))
+    xobjs = dict.get(res, "/XObject")
+    if isinstance(xobjs, IndirectObject):
+        xobjs = _keep_ref(cache, keep, xobjs)
+    if isinstance(xobjs, dict):
+        _keep_if_seen(cache, keep, dict.values(xobjs), seen)
+
+
+def _keep_if_seen(cache: dict, keep: set, refs, seen: set) -> None:
+    for ref in refs:
+        if isinstance(ref, IndirectObject):
+            key = (ref.generation, ref.idnum)
+            if key in seen:
+                _keep_reachable(cache, keep, ref)
+            seen.add(key)
+
+
+def _stream_pages(reader: PdfReader):
+    cache = getattr(reader, "resolved_objects", None)
+    npages = len(reader.pages)              # flattens the page tree, which must stay cached
+    keep = set(cache) if isinstance(cache, dict) else None
+    nkept = len(cache) if keep is not None else 0
+    in_objstm = getattr(reader, "xref_objStm", {})
+    seen: set[tuple] = set()           # content streams and XObjects some page has already used
+    for i in range(npages):
+        yield reader.pages[i]
+        if keep is not None:
+            # Everything cached before this page is kept, and the cache is insertion-ordered, so what the
+            # page added is exactly the tail past the nkept entries left last time.
+            added = list(itertools.islice(cache, nkept, None))
+            _keep_shared(cache, keep, reader.pages[i], seen)
+            for key in added:
+                obj = cache[key]
+                if key in keep:
+                    continue
+                if key[1] in in_objstm or (isinstance(obj, StreamObject) and dict.get(obj, "/Type") == "/ObjStm"):
+                    keep.add(key)
+                else:
+                    del cache[key]
+            nkept = len(cache)
+        gc.collect(1)
+
+
+# =============================================================================
+# Save policy shared by the PDF writers (AddStdMetadata, AddPdfPageHeader)
+#
+# A full, garbage-collected rewrite -- doc.save(tmp, garbage=4, deflate=True) and then a swap -- is the only
+# way to drop dead objects, but on a large scan it rewrites every image stream just to change a few small
+# objects. Under the adaptive policy a file at least _INCREMENTAL_SAVE_BYTES long is instead updated in
+# place by incremental append (saveIncr; no temp file, no swap) -- there the few dead bytes the edit leaves
+# behind are nothing next to the I/O saved. Smaller files always get the compact rewrite: every edit
+# replaces some objects (the /Info dict, a previous header's streams), and appending would leave those
+# dead bytes in the file for good.
+# Which path each save took is counted; PdfSaveStats() returns the counts for this process.
+#
+# The writers also take linearize=True, which saves a linearized ("fast web view") file: page 1 -- with its
+# header -- and the objects it needs come first, so a browser can show it before the rest of a large scan
+# has downloaded. Linearization is a property of the whole file (an incremental append breaks it), so it
+# always means a full rewrite. MuPDF has dropped linearization ("Linearisation is no longer supported"), so
+# the compact copy MuPDF writes is then linearized by qpdf, through pikepdf (pip install pikepdf). Without
+# pikepdf that is logged once and the files are saved unlinearized.
+#
+# Finally, optimize=<profile dict> opts in to a size-optimizing full rewrite for scans: oversized images
+# are downsampled and recompressed (PyMuPDF's rewrite_images), objects are packed into compressed object
+# streams, and every stream, image and font is deflated. Identical streams (the same image stored once per
+# page, say) are merged by the garbage=4 pass every full save already does. PDF_SIZE_PROFILE is the stock
+# profile; copy it and change the caps to taste:
+#   max_dpi        -- images above this effective resolution are downsampled (None: leave resolution alone)
+#   target_dpi     -- ...to this resolution
+#   jpeg_quality   -- JPEG quality (1-100) for lossy recompression of downsampled images
+#   object_streams -- pack objects into compressed object streams
+# The bytes before and after are logged and accumulated in PdfSaveStats() ("opt_bytes_in"/"opt_bytes_out").
+PDF_SIZE_PROFILE = {"max_dpi": 300, "target_dpi": 200, "jpeg_quality": 75, "object_streams": True}
+
+_INCREMENTAL_SAVE_BYTES = 64 * 1024 * 1024
+_save_stats = {"full": 0, "incremental": 0, "fallback": 0, "linear": 0,   # "fallback": full save failed, appended instead
+               "optimized": 0, "opt_bytes_in": 0, "opt_bytes_out": 0}
+_linear_unsupported = False   # set once linearizing was found to be unavailable (no pikepdf), to suppress repeat logs
+_rewrite_images_unsupported = False   # likewise for image downsampling (rewrite_images needs PyMuPDF 1.25+)
+
+
+def PdfSaveStats() -> dict:
+    return dict(_save_stats)
+
+
+def _save_mode(doc, path: str, adaptive: bool, rewrite: bool=False) -> str:
+    """Return "full" or "incremental" for saving `doc` (opened from `path`) under the save policy.
+    rewrite=True means the caller needs a full rewrite regardless (linearizing or optimizing)."""
+    if not adaptive or rewrite:
+        return "full"
+    try:
+        if not doc.can_save_incrementally():
+            return "full"
+    except Exception:
+        return "full"
+    try:
+        if os.path.getsize(path) >= _INCREMENTAL_SAVE_BYTES:
+            return "incremental"
+    except OSError:
+        pass
+    return "full"
+
+
+def _optimize_images(doc, profile: dict, caller: str) -> None:
+    """Downsample and recompress the images of `doc` in memory according to `profile`."""
+    global _rewrite_images_unsupported
+    if profile.get("max_dpi") is None or _rewrite_images_unsupported:
+        return
+    if not hasattr(doc, "rewrite_images"):
+        LogError(f"{caller}: this PyMuPDF cannot rewrite images (needs 1.25+); optimizing without downsampling")
+        _rewrite_images_unsupported = True
+        return
+    try:
+        doc.rewrite_images(dpi_threshold=profile["max_dpi"], dpi_target=profile.get("target_dpi", profile["max_dpi"]),
+                           quality=profile.get("jpeg_quality", 75))
+    except Exception as e:
+        LogError(f"{caller}: image downsampling failed for '{doc.name}' (saving without it): {e}")
+
+
+def _save_doc(doc, tmp_out: str, mode: str, caller: str, linear: bool=False, optimize: dict|None=None) -> bool:
+    """Save `doc` the way `mode` says. Return True if a compact copy was written to tmp_out (the caller must
+    swap it in once the document is closed), False if the file was updated in place."""
+    if mode == "full":
+        kw = {"garbage": 4, "deflate": True}
+        if optimize is not None:
+            _optimize_images(doc, optimize, caller)
+            kw.update(deflate_images=True, deflate_fonts=True)
+            if optimize.get("object_streams", True):
+                kw["use_objstms"] = 1
+        try:
+            doc.save(tmp_out, **kw)
+            _save_stats["full"] += 1
+            if linear:
+                _linearize(tmp_out, caller)
+            if optimize is not None:
+                _report_optimize(doc.name, tmp_out, caller)
+            return True
+        except Exception as e:
+            LogError(f"{caller}: compact save failed ({e}); using incremental save instead")
+            _save_stats["fallback"] += 1
+    else:
+        _save_stats["incremental"] += 1
+    doc.saveIncr()
+    return False
+
+
+def _linearize(path: str, caller: str) -> None:
+    """Rewrite the just-saved compact copy `path` linearized, in place. If that can't be done the file is
+    left as it is -- complete, just not linearized."""
+    global _linear_unsupported
+    if _linear_unsupported:
+        return
+    if _pikepdf is None:
+        LogError(f"{caller}: linearizing needs pikepdf (pip install pikepdf); saving unlinearized from now on")
+        _linear_unsupported = True
+        return
+    lin = path + ".lin.pdf"
+    try:
+        with _pikepdf.open(path) as pdf:
+            pdf.save(lin, linearize=True)
+        os.replace(lin, path)
+        _save_stats["linear"] += 1
+    except Exception as e:
+        LogError(f"{caller}: linearizing '{path}' failed ({e}); saving it unlinearized")
+        _remove_quietly(lin)
+
+
+def _report_optimize(src: str, tmp_out: str, caller: str) -> None:
+    try:
+        before, after = os.path.getsize(src), os.path.getsize(tmp_out)
+    except OSError:
+        return
+    _save_stats["optimized"] += 1
+    _save_stats["opt_bytes_in"] += before
+    _save_stats["opt_bytes_out"] += after
+    pct = (100.0 * (before - after) / before) if before else 0.0
+    Log(f"{caller}: optimized '{src}': {before:,} -> {after:,} bytes ({pct:.1f}% smaller)")
+
+
 # =============================================================================
 # Add standard bibliographic metadata fields to a PDF.
 # Only fields supplied with a non-empty value are written; omitted or empty fields are left unchanged.
-def AddStdMetadata(filename: str, title: str="", author: str="", subject: str="", keywords: str="") -> bool:
+# adaptive_save=False forces the full compact rewrite; linearize=True writes a linearized file and optimize=<profile>
+# a size-optimized one (see the save policy above).
+def AddStdMetadata(filename: str, title: str="", author: str="", subject: str="", keywords: str="", adaptive_save: bool=True,
+                   linearize: bool=False, optimize: dict|None=None) -> bool:
     if not filename.lower().endswith(".pdf"):
         return False
+    fields = _std_metadata_fields(title, author, subject, keywords)
+    if not fields:
+        return True  # Nothing to do
+    return _write_pdf_metadata(filename, fields, "adaptive" if adaptive_save else "full", "AddStdMetadata", linearize, optimize)
 
+
+# =============================================================================
+# Metadata-only fast path: the same update as AddStdMetadata, but ALWAYS written as a small incremental
+# update section appended to the file (the new /Info dict and the Catalog minus /Metadata), so the time
+# taken is proportional to the change, not to the file. Any XMP packet is unlinked but its bytes stay in
+# the file until a later CompactPdf() -- which can be run as a separate pass, off the critical path.
+# Files that cannot take an incremental update (e.g. ones MuPDF had to repair on open) get the full rewrite.
+def AppendStdMetadata(filename: str, title: str="", author: str="", subject: str="", keywords: str="") -> bool:
+    if not filename.lower().endswith(".pdf"):
+        return False
+    fields = _std_metadata_fields(title, author, subject, keywords)
+    if not fields:
+        return True  # Nothing to do
+    return _write_pdf_metadata(filename, fields, "incremental", "AppendStdMetadata")
+
+
+# =============================================================================
+# Rewrite a PDF compactly (garbage=4, deflate) in place, dropping everything earlier incremental updates
+# left behind (superseded /Info dicts, unlinked XMP packets, replaced fonts). linearize=True also linearizes it,
+# and optimize=<profile> (e.g. PDF_SIZE_PROFILE) also applies the size optimizations.
+def CompactPdf(filename: str, linearize: bool=False, optimize: dict|None=None) -> bool:
+    if not filename.lower().endswith(".pdf"):
+        return False
+    return _write_pdf_metadata(filename, None, "full", "CompactPdf", linearize, optimize)
+
+
+# =============================================================================
+# Apply a size-optimization profile to a PDF in place (see PDF_SIZE_PROFILE).
+# Returns {"before": bytes, "after": bytes}, or None if the file could not be rewritten.
+def OptimizePdf(filename: str, profile: dict|None=None) -> dict|None:
+    if not filename.lower().endswith(".pdf"):
+        return None
+    try:
+        before = os.path.getsize(filename)
+    except OSError as e:
+        LogError(f"OptimizePdf: Unable to open file {filename}: {e}")
+        return None
+    if not _write_pdf_metadata(filename, None, "full", "OptimizePdf", False, profile or PDF_SIZE_PROFILE):
+        return None
+    return {"before": before, "after": os.path.getsize(filename)}
+
+
+def _std_metadata_fields(title: str, author: str, subject: str, keywords: str) -> dict[str, str]:
     fields: dict[str, str] = {}
     if title:
         fields["title"] = title
@@ -162,77 +617,54 @@ def AddStdMetadata(filename: str, title: str="", author: str="", subject: str=""
         fields["subject"] = subject
     if keywords:
         fields["keywords"] = keywords
+    return fields
 
-    if not fields:
-        return True  # Nothing to do
 
+def _write_pdf_metadata(filename: str, fields: dict[str, str]|None, mode: str, caller: str, linear: bool=False,
+                        optimize: dict|None=None) -> bool:
+    """Apply `fields` (None = change nothing) to the DocInfo of `filename` and save it. `mode` is "full",
+    "incremental" or "adaptive" (let the save policy choose); `linear` and `optimize` ask for a linearized
+    or size-optimized full save."""
     try:
         fitz = _require_fitz()
     except ImportError as e:
         LogError(str(e))
         return False
 
-    # Open with a short retry: a just-written temp file can be transiently locked on Windows
+    # Open with retry: a just-written temp file can be transiently locked on Windows
     # (e.g. antivirus scanning %TEMP%), which surfaces as PermissionError on open.
-    doc = None
-    for attempt in range(6):
-        try:
-            doc = fitz.open(filename)
-            break
-        except FileNotFoundError:
-            LogError(f"AddStdMetadata: Unable to open file {filename}")
-            return False
-        except PermissionError:
-            time.sleep(0.25)
-    if doc is None:
-        LogError(f"AddStdMetadata: '{filename}' stayed locked (PermissionError) after retries")
+    try:
+        doc = RetryWithBackoff(lambda: _open_for_write(fitz, filename))
+    except FileNotFoundError:
+        LogError(f"{caller}: Unable to open file {filename}")
+        return False
+    except PermissionError:
+        LogError(f"{caller}: '{filename}' stayed locked (PermissionError) after retries")
         return False
 
     # set_metadata REPLACES the whole DocInfo dict, so seed from the existing writable fields and override
     # only the ones supplied -- that keeps the "omitted fields unchanged" contract. del_xml_metadata drops
     # any competing XMP packet (many viewers prefer XMP over /Info, e.g. a scanner-written dc:title), and
     # the full garbage-collected save then actually removes the dead XMP bytes from the file.
-    tmp_out = filename + ".min.pdf"
+    tmp_out = _tmp_path(filename)
     saved_compact = False
     try:
-        _writable = ("title", "author", "subject", "keywords", "creator", "producer", "creationDate", "modDate")
-        existing = doc.metadata or {}
-        md = {k: existing.get(k, "") for k in _writable}
-        md.update(fields)
-        doc.set_metadata(md)
-        doc.del_xml_metadata()
-        try:
-            doc.save(tmp_out, garbage=4, deflate=True)
-            saved_compact = True
-        except Exception as e:
-            LogError(f"AddStdMetadata: compact save failed ({e}); using incremental save instead")
-            doc.saveIncr()
+        if fields is not None:
+            _writable = ("title", "author", "subject", "keywords", "creator", "producer", "creationDate", "modDate")
+            existing = doc.metadata or {}
+            md = {k: existing.get(k, "") for k in _writable}
+            md.update(fields)
+            doc.set_metadata(md)
+            doc.del_xml_metadata()
+        if mode == "adaptive":
+            mode = _save_mode(doc, filename, True, linear or optimize is not None)
+        elif mode == "incremental" and not doc.can_save_incrementally():
+            mode = "full"
+        saved_compact = _save_doc(doc, tmp_out, mode, caller, linear, optimize)
     finally:
         doc.close()
 
-    if not saved_compact:
-        # The incremental save already updated the file in place; discard any partial compact file.
-        try:
-            if os.path.exists(tmp_out):
-                os.remove(tmp_out)
-        except Exception:
-            pass
-        return True
-
-    # Replace the original with the compact copy, retrying past transient Windows file locks.
-    for attempt in range(6):
-        try:
-            os.replace(tmp_out, filename)
-            return True
-        except PermissionError:
-            if attempt == 5:
-                LogError(f"AddStdMetadata: could not replace '{filename}' with the updated copy (locked)")
-                try:
-                    os.remove(tmp_out)
-                except Exception:
-                    pass
-                return False
-            time.sleep(0.25)
+    return _finish_save(tmp_out, filename, saved_compact, caller)
 
 
 # =============================================================================
@@ -247,6 +679,11 @@ def GetPdfPageCount(pathname: str) -> int|None:
 
     # So it claims to be a PDF.  Try to get its page count.
     try:
+        # A reader the pool already holds answers at once; otherwise counting only needs the xref and the page
+        # tree, so read those from the file rather than pooling (and copying into memory) the whole thing.
+        pooled = _handle_pool.Cached(pathname) if _handle_pool is not None else None
+        if pooled is not None:
+            return len(pooled.pages)
         with open(pathname, 'rb') as fl:
             reader=PdfReader(fl)
             return len(reader.pages)
@@ -255,6 +692,152 @@ def GetPdfPageCount(pathname: str) -> int|None:
     return None
 
 
+# =============================================================================
+# Optional LRU pool of open PDF handles
+#
+# Pipelines typically scan a file more than once (LowQualityScan with different settings, a page count, a
+# re-check after an edit), and each scan would open and parse it from scratch. EnablePdfHandlePool() turns
+# on a process-wide pool that keeps recently opened pypdf readers, keyed by path and validated against the
+# file's mtime and size (a changed file is reopened). It holds at most max_handles readers and about
+# max_bytes of PDF (estimated from file sizes), evicting the least recently used first.
+#   with OpenPdfReader(path) as reader:  -- a PdfReader for path, pooled if the pool is on. Either way the
+#                                          caller leaves it alone afterwards: a pooled reader stays in the
+#                                          pool, an unpooled one has its file closed on leaving the block.
+# Pooled readers parse an in-memory copy of the file, so they never hold it open; the writers here still
+# evict the path before opening it and again before swapping in the new file, so nothing stale survives an
+# edit. Writers always open the file afresh with PyMuPDF, which the pool does not hold.
+class PdfHandlePool:
+    def __init__(self, max_handles: int=8, max_bytes: int=256 * 2**20):
+        self._max_handles = max_handles
+        self._max_bytes   = max_bytes
+        self._entries: OrderedDict[str, tuple[tuple[int, int], PdfReader, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock  = threading.Lock()
+        self.hits   = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _stamp(path: str) -> tuple[int, int]:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    # A pooled PdfReader for path, parsed from an in-memory copy so no file handle stays open.
+    # The pool keeps ownership: don't close it.
+    def Reader(self, path: str) -> PdfReader:
+        key, stamp = self._key(path), self._stamp(path)
+        with self._lock:
+            hit = self._get(key, stamp)
+            if hit is not None:
+                return hit
+        with open(path, "rb") as f:
+            reader = PdfReader(io.BytesIO(f.read()))
+        with self._lock:
+            self._put(key, stamp, reader, stamp[1])
+        return reader
+
+    # The reader the pool already holds for path (still current), or None. Never opens anything.
+    def Cached(self, path: str) -> PdfReader|None:
+        key, stamp = self._key(path), self._stamp(path)
+        with self._lock:
+            return self._get(key, stamp)
+
+    # Close and forget the reader on path (call before anything replaces or appends to the file).
+    def Evict(self, path: str) -> None:
+        with self._lock:
+            if self._key(path) in self._entries:
+                self._drop(self._key(path))
+
+    def Clear(self) -> None:
+        with self._lock:
+            for _, handle, _ in self._entries.values():
+                _close_handle(handle)
+            self._entries.clear()
+            self._bytes = 0
+
+    # --- the rest must be called with self._lock held ---
+    def _get(self, key, stamp):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != stamp:           # the file changed since it was pooled
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def _put(self, key, stamp, handle, nbytes):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (stamp, handle, nbytes)
+        self._bytes += nbytes
+        while len(self._entries) > 1 and (len(self._entries) > self._max_handles or self._bytes > self._max_bytes):
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, handle, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+        _close_handle(handle)
+
+
+def _close_handle(handle) -> None:
+    try:
+        if hasattr(handle, "close"):
+            handle.close()
+    except Exception:
+        pass
+
+
+_handle_pool: PdfHandlePool|None = None
+
+
+def EnablePdfHandlePool(max_handles: int=8, max_bytes: int=256 * 2**20) -> PdfHandlePool:
+    global _handle_pool
+    if _handle_pool is not None:
+        _handle_pool.Clear()
+    _handle_pool = PdfHandlePool(max_handles, max_bytes)
+    return _handle_pool
+
+
+def DisablePdfHandlePool() -> None:
+    global _handle_pool
+    if _handle_pool is not None:
+        _handle_pool.Clear()
+    _handle_pool = None
+
+
+# Without the pool the reader reads the file as it goes rather than copying it into memory first; the file
+# is closed when the with block ends, so use the reader only inside it.
+@contextlib.contextmanager
+def OpenPdfReader(path: str):
+    if _handle_pool is not None:
+        yield _handle_pool.Reader(path)
+        return
+    with open(path, "rb") as f:
+        yield PdfReader(f)
+
+
+# Open path for modification, first closing any pooled handles on it.
+def _open_for_write(fitz, path: str):
+    if _handle_pool is not None:
+        _handle_pool.Evict(path)
+    try:
+        return fitz.open(path)
+    except RuntimeError:
+        # MuPDF reports a file it could not open because it is locked the same way as a damaged one
+        # (FileDataError). Python's own open tells them apart: a lock raises PermissionError here, which
+        # RetryWithBackoff waits out; anything else is re-raised as is and fails at once.
+        with open(path, "rb"):
+            pass
+        raise
+
+
 # =============================================================================
 # PDF page-header support (requires PyMuPDF / fitz)
 #
@@ -291,13 +874,12 @@ _FONT_FILE = r"C:\Windows\Fonts\calibri.ttf"
 _FONT_FILE = _FONT_FILE if os.path.exists(_FONT_FILE) else None   # graceful fallback
 _FONT_FALLBACK = "helv"   # used only when Calibri is not found
 _FONT_NAME = "cali"       # internal id under which Calibri is embedded
-# kwargs passed to insert_textbox so it uses the same font the wrap/layout code measures with
+# kwargs passed to insert_text so it uses the same font the wrap/layout code measures with
 _FONT_KW = {"fontname": _FONT_NAME, "fontfile": _FONT_FILE} if _FONT_FILE else {"fontname": _FONT_FALLBACK}
 
 _FONT_SIZE = 11            # header text point size
 _BAND_Y0   = 8              # top of label band
 _LINE_H    = 16             # height of label band
-_PAD       = 6              # extra textbox length so a tight segment is never clipped
 _SIDE      = 6              # left/right margin kept clear when wrapping the header
 _GAP       = 4              # whitespace below label before page content
 _EXTRA     = _BAND_Y0 + _LINE_H + _GAP   # points added to page height = 28
@@ -315,13 +897,130 @@ _EXTENT_KEY = "FanacHdrPts" # page-dict key recording how many points a previous
 # logo is logged ONCE and then quietly skipped for the rest of the run.
 _LOGO_VPAD     = 1       # display points of breathing room above/below the logo within the band
 _logo_disabled = False   # set once a load failure has been logged, to suppress retries + repeat logs
+# A batch stamps the same logo at the same band height on every file, so both the decoded image and the
+# final (rotated, downsampled, PNG-encoded) raster are cached; see _load_logo and _logo_png.
+_logo_images:    dict[tuple, object] = {}   # _logo_key -> decoded RGBA PIL Image
+_logo_png_cache: dict[tuple, bytes]  = {}   # (_logo_key, cap, rotation) -> PNG bytes
+_LOGO_CACHE_MAX = 32     # entries per cache before it is started afresh
+
+# ── font metrics cache ───────────────────────────────────────────────────────
+# Loading Calibri from disk and measuring the same tokens over and over dominates header layout in a
+# batch, so the fitz.Font is built once per process and token widths come from a per-(font, size)
+# glyph-advance table. Measured widths are memoized per token; a recurring format string then lays out
+# with dictionary lookups only. (fitz's text_length is the plain sum of glyph advances -- no kerning --
+# so the table gives identical results.)
+_font_obj      = None    # process-wide header font, built on first use by _make_font
+_advance_table: dict[tuple, dict[str, float]] = {}   # (font, size) -> {char: advance in points}
+_width_memo:    dict[tuple, dict[str, float]] = {}   # (font, size) -> {token: width in points}
+_WIDTH_MEMO_MAX = 50000  # tokens remembered per (font, size) before the memo is started afresh
 
 
 def _make_font(fitz):
-    """Return a fitz.Font using Calibri if available, otherwise Helvetica."""
-    if _FONT_FILE:
-        return fitz.Font(fontfile=_FONT_FILE)
-    return fitz.Font(_FONT_FALLBACK)
+    """Return the process-wide fitz.Font: Calibri if available, otherwise Helvetica."""
+    global _font_obj
+    if _font_obj is None:
+        _font_obj = fitz.Font(fontfile=_FONT_FILE) if _FONT_FILE else fitz.Font(_FONT_FALLBACK)
+    return _font_obj
+
+
+def _text_width(font, text, fontsize=_FONT_SIZE):
+    """Width of `text` in points, equal to font.text_length(text, fontsize=fontsize), from the cached
+    glyph-advance table."""
+    key   = (font, fontsize)
+    memo  = _width_memo.setdefault(key, {})
+    width = memo.get(text)
+    if width is None:
+        adv   = _advance_table.setdefault(key, {})
+        width = 0.0
+        for c in text:
+            a = adv.get(c)
+            if a is None:
+                a = adv[c] = font.glyph_advance(ord(c)) * fontsize
+            width += a
+        if len(memo) >= _WIDTH_MEMO_MAX:
+            memo.clear()
+        memo[text] = width
+    return width
+
+
+# ── pre-subsetted header font ────────────────────────────────────────────────
+# doc.subset_fonts() walks the whole document and re-subsets the full Calibri embed for every file, even
+# though the header's character set is small and predictable. With presubset=True, AddPdfPageHeader
+# instead embeds a subset built ONCE per run (per distinct character set) and skips the per-document
+# subsetting pass. The subset always covers printable ASCII plus the usual typographic punctuation, so
+# in practice a whole batch shares a single cached font; characters outside that base set extend the
+# cache key. The subset is made by MuPDF itself on a throwaway one-page document.
+# MuPDF's subsetter keeps every glyph id (unused glyphs are just emptied) but drops the 'cmap' table, since
+# the text it subsets is already stored as glyph ids. The header still has to be drawn from characters, so
+# the full font's cmap -- still valid for the unchanged glyph ids -- is copied back into the subset.
+_SUBSET_BASE_CHARS = "".join(chr(c) for c in range(0x20, 0x7F)) + "\u00A0\u2013\u2014\u2018\u2019\u201C\u201D\u2026"
+_subset_font_cache: dict[frozenset, bytes|None] = {}   # extra chars beyond the base set -> subset font bytes
+
+
+def _sfnt_tables(data):
+    """{tag: table bytes} of a TrueType/OpenType font file."""
+    n = struct.unpack_from(">H", data, 4)[0]
+    tables = {}
+    for i in range(n):
+        tag, _, off, length = struct.unpack_from(">4sIII", data, 12 + 16*i)
+        tables[tag] = data[off:off+length]
+    return tables
+
+
+def _with_cmap(sub, full):
+    """Return the font file `sub` with the 'cmap' table of `full` added, if `sub` lacks one."""
+    tables = _sfnt_tables(sub)
+    if b"cmap" in tables:
+        return sub
+    tables[b"cmap"] = _sfnt_tables(full)[b"cmap"]
+    n   = len(tables)
+    sel = n.bit_length() - 1
+    out = [struct.pack(">4sHHHH", sub[:4], n, 16 << sel, sel, 16*n - (16 << sel))]
+    body, off = [], 12 + 16*n
+    for tag in sorted(tables):
+        t = tables[tag] + b"\0" * (-len(tables[tag]) % 4)
+        out.append(struct.pack(">4sIII", tag, sum(struct.unpack(f">{len(t)//4}I", t)) & 0xFFFFFFFF, off, len(tables[tag])))
+        body.append(t)
+        off += len(t)
+    return b"".join(out + body)
+
+
+def _subset_font_bytes(fitz, chars):
+    """Return cached bytes of a Calibri subset covering `chars` (plus the base set), or None if no subset
+    can be used (no Calibri, or MuPDF could not produce one) -- the caller then embeds the full font."""
+    if not _FONT_FILE:
+        return None
+    extra = frozenset(c for c in chars if c.isprintable()) - frozenset(_SUBSET_BASE_CHARS)
+    if extra in _subset_font_cache:
+        return _subset_font_cache[extra]
+    text = _SUBSET_BASE_CHARS + "".join(sorted(extra))
+    data = None
+    scratch = fitz.open()
+    try:
+        page = scratch.new_page(width=20000)
+        page.insert_text((10, 20), text, fontsize=_FONT_SIZE, fontname=_FONT_NAME, fontfile=_FONT_FILE)
+        scratch.subset_fonts()
+        xref = scratch.get_page_fonts(0)[0][0]
+        data = scratch.extract_font(xref)[3] or None
+        if data is not None:
+            with open(_FONT_FILE, "rb") as f:
+                data = _with_cmap(data, f.read())
+            # Usable only if the glyph ids really were kept: same glyph count, every character mapped,
+            # and every advance matching the full font the layout measures with.
+            sub, full = fitz.Font(fontbuffer=data), _make_font(fitz)
+            if sub.glyph_count != full.glyph_count or \
+                    not all(sub.has_glyph(ord(c)) and sub.glyph_advance(ord(c)) == full.glyph_advance(ord(c))
+                            for c in text if not c.isspace()):
+                data = None
+        if data is None:
+            LogError("AddPdfPageHeader: could not build a pre-subsetted header font; embedding the full font")
+    except Exception as e:
+        LogError(f"AddPdfPageHeader: building the pre-subsetted header font failed; embedding the full font: {e}")
+        data = None
+    finally:
+        scratch.close()
+    _subset_font_cache[extra] = data
+    return data
 
 
 # ── parsing ──────────────────────────────────────────────────────────────────
@@ -388,7 +1087,7 @@ def _wrap(segments, font, max_width):
     Returns a list of lines, each a list of (text, url) tokens with end whitespace trimmed.
     A single token wider than max_width is left on its own line (it may overflow)."""
     def w(tok):
-        return font.text_length(tok[0], fontsize=_FONT_SIZE)
+        return _text_width(font, tok[0])
     lines, cur, cur_w = [], [], 0.0
     for tok in _tokenize(segments):
         space = tok[0].isspace()
@@ -504,25 +1203,34 @@ def _remove_header(page, amount, fitz):
         pass   # set_mediabox already auto-adjusted the cropbox to cover the new extent
 
 
-def _add_label(page, lines, fitz, block_x0, block_w):
+def _add_label(page, lines, fitz, block_x0, block_w, font_kw=None, insert_links=True):
     # Each line is centered within the text block [block_x0, block_x0+block_w]. The block is positioned
-    # by the caller so that (block + gap + logo) is centered on the page.
+    # by the caller so that (block + gap + logo) is centered on the page. font_kw overrides _FONT_KW
+    # (e.g. to embed a pre-subsetted font buffer); the metrics are the same either way.
+    # Returns the link areas as (url, display Rect); with insert_links=False they are not added to the page.
+    font_kw = font_kw or _FONT_KW
+    if "fontbuffer" in font_kw:
+        # insert_text takes no font buffer: register the font on the page once, then draw by name
+        page.insert_font(**font_kw)
+        font_kw = {"fontname": font_kw["fontname"]}
+    all_links = []
     font = _make_font(fitz)
     dm   = page.derotation_matrix
     rot  = page.rotation
     for i, line in enumerate(lines):
         y0      = _BAND_Y0 + i * _LINE_H
-        total_w = sum(font.text_length(t, fontsize=_FONT_SIZE) for t, _ in line)
+        # Draw at an explicit baseline rather than into a line-high textbox: insert_textbox silently draws
+        # nothing when the font's line height (Helvetica's is taller than Calibri's) overflows the box.
+        base    = y0 + font.ascender * _FONT_SIZE
+        total_w = sum(_text_width(font, t) for t, _ in line)
         x       = block_x0 + (block_w - total_w) / 2.0
         links   = []   # consecutive same-url runs on this line: [url, x0, x1]
         for text, url in line:
-            w = font.text_length(text, fontsize=_FONT_SIZE)
+            w = _text_width(font, text)
             # Lay each token out in display coords, then map to the unrotated page space that
             # PyMuPDF's write methods use; rotate=rot keeps text upright on rotated pages.
-            box = fitz.Rect(x, y0, x + w + _PAD, y0 + _LINE_H) * dm
-            box.normalize()
-            page.insert_textbox(box, text, fontsize=_FONT_SIZE,
-                                color=_COLOR_LINK if url else _COLOR_TEXT, rotate=rot, **_FONT_KW)
+            page.insert_text(fitz.Point(x, base) * dm, text, fontsize=_FONT_SIZE,
+                             color=_COLOR_LINK if url else _COLOR_TEXT, rotate=rot, **font_kw)
             if url:
                 if links and links[-1][0] == url and abs(links[-1][2] - x) < 0.5:
                     links[-1][2] = x + w               # extend the current run
@@ -530,67 +1238,222 @@ def _add_label(page, lines, fitz, block_x0, block_w):
                     links.append([url, x, x + w])
             x += w
         for url, lx0, lx1 in links:
-            link = fitz.Rect(lx0, y0, lx1, y0 + _LINE_H) * dm
-            link.normalize()
-            page.insert_link({"kind": fitz.LINK_URI, "from": link, "uri": url})
+            all_links.append((url, fitz.Rect(lx0, y0, lx1, y0 + _LINE_H)))
+            if insert_links:
+                link = fitz.Rect(lx0, y0, lx1, y0 + _LINE_H) * dm
+                link.normalize()
+                page.insert_link({"kind": fitz.LINK_URI, "from": link, "uri": url})
+    return all_links
+
+
+def _layout(segments, font, width, aspect, gap):
+    """Lay the header out for a page `width` display points wide. Returns (lines, amount, block_dx, block_w):
+    the wrapped lines, the points the header adds to the page, and the text block's offset from the page's
+    left edge and its width, positioned so that [text block | gap | logo] is centered as a group."""
+    # Wrap the header to as many lines as needed to fit the page width (page rotation does not change the
+    # displayed width). Estimate the logo's width from the single-line band height for the reservation
+    # (exact for a one-line header).
+    est_logo_w = ((_EXTRA - 2 * _LOGO_VPAD) * aspect) if aspect else 0.0
+    lines  = _wrap(segments, font, width - 2 * _SIDE - gap - est_logo_w)
+    amount = _EXTRA + (len(lines) - 1) * _LINE_H
+
+    # Now that the (possibly multi-line) band height is known, center [text | gap | logo] as a group.
+    logo_w   = ((amount - 2 * _LOGO_VPAD) * aspect) if aspect else 0.0
+    block_w  = max((sum(_text_width(font, t) for t, _ in ln) for ln in lines), default=0.0)
+    group_w  = block_w + (gap + logo_w if aspect else 0.0)
+    block_dx = max(_SIDE, (width - group_w) / 2.0)
+    return lines, amount, block_dx, block_w
+
+
+def _logo_key(logo):
+    """Identity of a CALLER-supplied logo for the caches below: a path is identified by its absolute path,
+    size and mtime (so an edited file is picked up); raw bytes by their length and digest."""
+    if isinstance(logo, (bytes, bytearray)):
+        return ("bytes", len(logo), hashlib.blake2b(logo, digest_size=16).digest())
+    st = os.stat(logo)
+    return ("path", os.path.abspath(logo), st.st_size, st.st_mtime_ns)
 
 
 def _load_logo(logo):
-    """Return the CALLER-supplied logo as a PIL RGBA Image (upright), or None. `logo` may be raw image
-    bytes or a path to an image file. Any failure (logo None, no Pillow, unreadable data) is logged
-    ONCE; after that the logo is skipped silently for the rest of the run."""
+    """Return (key, image): the CALLER-supplied logo as a PIL RGBA Image (upright) and its _logo_key, or
+    (None, None). `logo` may be raw image bytes or a path to an image file. The decoded image is cached by
+    key, so a batch decodes its logo once; callers must not modify it in place. Any failure (logo None, no
+    Pillow, unreadable data) is logged ONCE; after that the logo is skipped silently for the rest of the run."""
     global _logo_disabled
     if logo is None or _logo_disabled:
-        return None
+        return None, None
     try:
-        from PIL import Image
-        if isinstance(logo, (bytes, bytearray)):
-            data = bytes(logo)
-        else:
-            with open(logo, "rb") as f:
-                data = f.read()
-        return Image.open(io.BytesIO(data)).convert("RGBA")
+        key = _logo_key(logo)
+        im  = _logo_images.get(key)
+        if im is None:
+            from PIL import Image
+            if isinstance(logo, (bytes, bytearray)):
+                data = bytes(logo)
+            else:
+                with open(logo, "rb") as f:
+                    data = f.read()
+            im = Image.open(io.BytesIO(data)).convert("RGBA")
+            if len(_logo_images) >= _LOGO_CACHE_MAX:
+                _logo_images.clear()
+            _logo_images[key] = im
+        return key, im
     except Exception as e:
         LogError(f"PDF header logo unavailable; disabling it for this run: {e}")
         _logo_disabled = True
-        return None
+        return None, None
+
 
+def _logo_png(im, key, cap, rot):
+    """Return the PNG bytes of logo `im` rotated by `rot` and reduced to fit a cap x cap box. The result is
+    cached by (key, cap, rot): in a batch only the first file pays for the rotate/LANCZOS/encode."""
+    from PIL import Image
+    ck   = (key, cap, rot)
+    data = _logo_png_cache.get(ck) if key is not None else None
+    if data is None:
+        im = im.rotate((-rot) % 360, expand=True) if rot else im.copy()   # never thumbnail the cached original
+        im.thumbnail((cap, cap), Image.LANCZOS)
+        buf = io.BytesIO(); im.save(buf, "PNG"); data = buf.getvalue()
+        if key is not None:
+            if len(_logo_png_cache) >= _LOGO_CACHE_MAX:
+                _logo_png_cache.clear()
+            _logo_png_cache[ck] = data
+    return data
+
+
+def _write_rect(page, disp, fitz):
+    """Map display-coords rect `disp` to the rect insert_image and show_pdf_page expect. Both convert it to
+    PDF coordinates with ~page.transformation_matrix, which on a rotated page ignores the CropBox origin --
+    and expanding a rotated page moves that origin (negative x at 90, negative y at 180). So go through PDF
+    coordinates explicitly: derotate, place against the CropBox's top-left corner, and map back."""
+    u = disp * page.derotation_matrix
+    u.normalize()
+    x0, top = page.cropbox.x0, page.mediabox.y1 - page.cropbox.y0    # page.cropbox is y-flipped against the MediaBox top
+    r = fitz.Rect(x0 + u.x0, top - u.y1, x0 + u.x1, top - u.y0) * page.transformation_matrix
+    r.normalize()
+    return r
 
-def _add_logo(page, fitz, band_h, x0, im):
+
+def _add_logo(page, fitz, band_h, x0, im, key=None):
     """Place the already-loaded PIL logo `im` with its left edge at display-x `x0`, sized to the FULL
     band height `band_h` (so it is as large as the white space allows without enlarging the header),
-    pre-rotated to stay upright on a sideways-scanned page."""
-    from PIL import Image
+    pre-rotated to stay upright on a sideways-scanned page. `key` (from _load_logo) enables the
+    processed-raster cache."""
     rot    = page.rotation
     aspect = im.size[0] / im.size[1]                    # upright (display) aspect
     h      = band_h - 2 * _LOGO_VPAD                    # fill the band, leaving a little breathing room
     w      = h * aspect
-    if rot:
-        im = im.rotate((-rot) % 360, expand=True)       # counter the page's display rotation
-    cap = max(8, int(round(h)) * 4)                     # deresolve: ~4x the slot height is plenty
-    im.thumbnail((cap, cap), Image.LANCZOS)
-    buf = io.BytesIO(); im.save(buf, "PNG"); data = buf.getvalue()
+    cap    = max(8, int(round(h)) * 4)                  # deresolve: ~4x the slot height is plenty
+    data   = _logo_png(im, key, cap, rot)               # counter-rotated against the page's display rotation
     y0   = (band_h - h) / 2.0                           # vertically centered in the band
-    disp = fitz.Rect(x0, y0, x0 + w, y0 + h)
-    # insert_image takes the rect in the page's unrotated coordinate system, measured from the MediaBox
-    # origin -- so derotate (handles rotation) and then add the MediaBox origin (handles the negative
-    # origin the page picked up when it was expanded). rotate=0: the raster is already pre-rotated.
-    r = disp * page.derotation_matrix
-    r.normalize()
-    mb = page.mediabox
-    r = fitz.Rect(r.x0 + mb.x0, r.y0 + mb.y0, r.x1 + mb.x0, r.y1 + mb.y0)
+    r    = _write_rect(page, fitz.Rect(x0, y0, x0 + w, y0 + h), fitz)
+    # rotate=0: the raster is already pre-rotated.
     try:
         page.insert_image(r, stream=data, rotate=0, keep_proportion=True, overlay=True)
     except Exception as e:
         LogError(f"AddPdfPageHeader: insert header logo failed: {e}")
 
 
+def _remove_existing_header(doc, page, fitz):
+    # Updating a header must yield the same result as removing the old header entirely and then
+    # adding the new one. So first restore the page to its pre-header state, then add de novo.
+    old_amount = _read_extent(doc, page)
+    if old_amount is None and _already_labeled(page, fitz):
+        old_amount = _EXTRA          # legacy header (pre-multi-line) was always a single line
+    if old_amount:
+        _remove_header(page, old_amount, fitz)
+
+
+# ── running headers (every page) ─────────────────────────────────────────────
+# Stamping N pages one by one would repeat the layout, the text and font insertion, and the logo N times.
+# Instead the header is drawn ONCE onto a one-page scratch document sized exactly like the header band,
+# and each target page shows that page via show_pdf_page -- which MuPDF stores as a single form XObject
+# (with the font and logo inside it) and reuses for every page it is shown on. Per page that leaves only
+# the box expansion, a tiny reference to the XObject, and the links (which an XObject cannot carry).
+# The band is drawn on a scratch page with the target's rotation and then un-rotated, so the verified
+# rotation handling of _add_label/_add_logo carries over unchanged. One scratch page is built per
+# distinct page geometry (rotation, width); an ordinary issue needs just one.
+
+def _header_page_numbers(doc, pages):
+    """The sorted 0-based page numbers named by AddPdfPageHeader's `pages` argument: "all" (any case) or an
+    iterable of page numbers. Anything else, or a page number the document doesn't have, is a ValueError --
+    a mistyped page list must not quietly stamp fewer pages."""
+    if isinstance(pages, str):
+        if pages.lower() != "all":
+            raise ValueError(f"pages must be \"all\" or a list of page numbers, not {pages!r}")
+        return list(range(doc.page_count))
+    pnos = set()
+    for p in pages:
+        if not isinstance(p, int) or isinstance(p, bool):
+            raise ValueError(f"page number {p!r} is not an int")
+        if not 0 <= p < doc.page_count:
+            raise ValueError(f"page number {p} is out of range (the document has {doc.page_count} pages)")
+        pnos.add(p)
+    return sorted(pnos)
+
+
+def _header_source(fitz, width, rot, lines, amount, block_dx, block_w, gap, font_kw, logo_im, logo_key):
+    """Return (scratch doc, links): a one-page document holding the header band for pages `width` display
+    points wide with rotation `rot`, drawn in that page's unrotated space; and the band's links."""
+    src = fitz.open()
+    w, h = (width, amount) if rot in (0, 180) else (amount, width)
+    sp = src.new_page(width=w, height=h)
+    sp.set_rotation(rot)
+    links = _add_label(sp, lines, fitz, block_dx, block_w, font_kw, insert_links=False)
+    if logo_im is not None:
+        _add_logo(sp, fitz, amount, block_dx + block_w + gap, logo_im, logo_key)
+    sp.set_rotation(0)
+    if font_kw is None:
+        try:
+            src.subset_fonts()      # one small page: far cheaper than subsetting the whole target later
+        except Exception as e:
+            LogError(f"AddPdfPageHeader: subset_fonts() failed (continuing without subsetting): {e}")
+    return src, links
+
+
+def _add_shared_headers(doc, pnos, segments, fitz, font, font_kw, logo_im, logo_key, aspect, gap):
+    sources = {}     # (rotation, width) -> (scratch doc, lines, amount, links)
+    try:
+        for pno in pnos:
+            page = doc[pno]
+            _remove_existing_header(doc, page, fitz)
+            rot, width = page.rotation, round(page.rect.width, 2)
+            if (rot, width) not in sources:
+                lines, amount, block_dx, block_w = _layout(segments, font, width, aspect, gap)
+                src, links = _header_source(fitz, width, rot, lines, amount, block_dx, block_w, gap,
+                                            font_kw, logo_im, logo_key)
+                sources[(rot, width)] = (src, lines, amount, links)
+            src, lines, amount, links = sources[(rot, width)]
+
+            _expand_top(page, fitz, len(lines))
+            r = _write_rect(page, fitz.Rect(page.rect.x0, 0, page.rect.x0 + width, amount), fitz)
+            page.show_pdf_page(r, src, 0, keep_proportion=False, overlay=True)
+            for url, lr in links:
+                link = fitz.Rect(lr.x0 + page.rect.x0, lr.y0, lr.x1 + page.rect.x0, lr.y1) * page.derotation_matrix
+                link.normalize()
+                page.insert_link({"kind": fitz.LINK_URI, "from": link, "uri": url})
+            _write_extent(doc, page, amount)
+    finally:
+        for src, _, _, _ in sources.values():
+            src.close()
+
+
 # ── public API ────────────────────────────────────────────────────────────────
 
-def AddPdfPageHeader(pdf_path: str, format_string: str, items: list, logo=None) -> None:
+def AddPdfPageHeader(pdf_path: str, format_string: str, items: list, logo=None, presubset: bool=False,
+                     adaptive_save: bool=True, linearize: bool=False, optimize: dict|None=None,
+                     pages: str|list[int]|None=None) -> bool:
     """
     Add or replace a header on the first page of pdf_path.
     See module docstring for format_string / items conventions.
+    pages="all" (or a list of 0-based page numbers) puts the header on those pages instead, as a running
+    header laid out once and shared by every page as a single form XObject; any other string, or a page
+    number the document doesn't have, raises ValueError.
+    presubset=True embeds a header font subset cached across calls instead of subsetting each document.
+    adaptive_save=False forces the full compact rewrite, and linearize=True saves a linearized ("fast web
+    view") file so page 1 shows early in a browser (needs pikepdf), and optimize=<profile> (e.g. PDF_SIZE_PROFILE) shrinks
+    oversized scans (see the save policy near AddStdMetadata).
+    Returns True, or False if the header was not written (no pages, or the updated file could not be put
+    in place); the reason is logged.
     Requires PyMuPDF: install with  pip install pymupdf
     """
     fitz = _require_fitz()
@@ -602,99 +1465,525 @@ def AddPdfPageHeader(pdf_path: str, format_string: str, items: list, logo=None)
         raise FileNotFoundError(f"AddPdfPageHeader: '{pdf_path}' does not exist")
 
     # Retry the open: a just-written temp file can be transiently locked on Windows (antivirus scanning
-    # %TEMP%). The lock can surface as more than one exception type, so retry broadly.
-    doc = None
-    for attempt in range(6):
-        try:
-            doc = fitz.open(pdf_path)
-            break
-        except Exception:
-            if attempt == 5:
-                raise
-            time.sleep(0.25)
+    # %TEMP%). Only the lock is retried (see _open_for_write); a damaged or non-PDF file fails at once.
+    doc = RetryWithBackoff(lambda: _open_for_write(fitz, pdf_path))
 
     # Everything past the open runs under try/finally so the document is ALWAYS closed -- an un-closed
     # fitz document keeps the file locked on Windows, which would block the caller's temp-file cleanup.
-    tmp_out = pdf_path + ".min.pdf"
+    tmp_out = _tmp_path(pdf_path)
     saved_compact = False
     try:
         if doc.page_count == 0:
             LogError(f"AddPdfPageHeader: '{pdf_path}' has no pages; header skipped")
-            return
-        page = doc[0]
-
-        # Updating a header must yield the same result as removing the old header entirely and then
-        # adding the new one. So first restore the page to its pre-header state, then add de novo.
-        old_amount = _read_extent(doc, page)
-        if old_amount is None and _already_labeled(page, fitz):
-            old_amount = _EXTRA          # legacy header (pre-multi-line) was always a single line
-        if old_amount:
-            _remove_header(page, old_amount, fitz)
+            return False
 
         # The header is laid out as one centered group: [text block] [gap] [logo]. The logo sits a fixed
         # gap -- about the width of "conpubs" -- to the right of the text, and is band-tall. Reserve that
-        # block when wrapping so the text fits beside it.
+        # block when wrapping so the text fits beside it (see _layout).
         font    = _make_font(fitz)
-        logo_im = _load_logo(logo)
+        logo_key, logo_im = _load_logo(logo)
         aspect  = (logo_im.size[0] / logo_im.size[1]) if logo_im else None
-        gap     = font.text_length("conpubs", fontsize=_FONT_SIZE) if aspect else 0.0
-
-        # Wrap the header to as many lines as needed to fit the page width (page rotation does not
-        # change the displayed width, so this is valid before expanding the page). Estimate the logo's
-        # width from the single-line band height for the reservation (exact for a one-line header).
-        est_logo_w = ((_EXTRA - 2 * _LOGO_VPAD) * aspect) if aspect else 0.0
-        lines  = _wrap(segments, font, page.rect.width - 2 * _SIDE - gap - est_logo_w)
-        amount = _EXTRA + (len(lines) - 1) * _LINE_H
-        _expand_top(page, fitz, len(lines))
-
-        # Now that the (possibly multi-line) band height is known, center [text | gap | logo] as a group.
-        logo_w = ((amount - 2 * _LOGO_VPAD) * aspect) if aspect else 0.0
-        block_w = max((sum(font.text_length(t, fontsize=_FONT_SIZE) for t, _ in ln) for ln in lines), default=0.0)
-        group_w = block_w + (gap + logo_w if aspect else 0.0)
-        block_x0 = max(page.rect.x0 + _SIDE, page.rect.x0 + (page.rect.width - group_w) / 2.0)
-        _add_label(page, lines, fitz, block_x0, block_w)
-        if aspect:
-            _add_logo(page, fitz, amount, block_x0 + block_w + gap, logo_im)
-        _write_extent(doc, page, amount)
+        gap     = _text_width(font, "conpubs") if aspect else 0.0
+
+        font_kw = None
+        if presubset:
+            sub = _subset_font_bytes(fitz, "".join(t for t, _ in segments))
+            if sub is not None:
+                font_kw = {"fontname": _FONT_NAME, "fontbuffer": sub}
+
+        subset_needed = font_kw is None
+        if pages is not None:
+            # Running headers: laid out once per page geometry and shared as a form XObject, whose font
+            # was already subset when it was built.
+            _add_shared_headers(doc, _header_page_numbers(doc, pages), segments, fitz, font, font_kw,
+                                logo_im, logo_key, aspect, gap)
+            subset_needed = False
+        else:
+            page = doc[0]
+            _remove_existing_header(doc, page, fitz)
+            lines, amount, block_dx, block_w = _layout(segments, font, page.rect.width, aspect, gap)
+            _expand_top(page, fitz, len(lines))
+            block_x0 = page.rect.x0 + block_dx
+            _add_label(page, lines, fitz, block_x0, block_w, font_kw)
+            if aspect:
+                _add_logo(page, fitz, amount, block_x0 + block_w + gap, logo_im, logo_key)
+            _write_extent(doc, page, amount)
 
         # Subset the just-embedded header font and rewrite the file compactly. Embedding the full Calibri
         # TTF (~1.6 MB) otherwise bloats even tiny PDFs. A full, garbage-collected save is required to drop
         # the original full-font stream (an incremental save can only append). If the compact path isn't
         # available, fall back to an incremental save -- correct, just larger.
-        try:
-            doc.subset_fonts()
-        except Exception as e:
-            LogError(f"AddPdfPageHeader: subset_fonts() failed (continuing without subsetting): {e}")
-        try:
-            doc.save(tmp_out, garbage=4, deflate=True)
-            saved_compact = True
-        except Exception as e:
-            LogError(f"AddPdfPageHeader: compact save failed ({e}); using incremental save instead")
-            doc.saveIncr()
+        # (Skipped when the header was drawn with a pre-subsetted font: there is nothing left to subset.)
+        if subset_needed:
+            try:
+                doc.subset_fonts()
+            except Exception as e:
+                LogError(f"AddPdfPageHeader: subset_fonts() failed (continuing without subsetting): {e}")
+        mode = _save_mode(doc, pdf_path, adaptive_save, linearize or optimize is not None)
+        saved_compact = _save_doc(doc, tmp_out, mode, "AddPdfPageHeader", linearize, optimize)
     finally:
         doc.close()
 
     # The document handle is now closed, so the on-disk swap is safe.
-    if not saved_compact:
-        # The incremental save already updated pdf_path in place; discard any partial compact file.
+    return _finish_save(tmp_out, pdf_path, saved_compact, "AddPdfPageHeader")
+
+
+# =============================================================================
+# PDF corpus inventory (requires PyMuPDF / fitz)
+#
+# InventoryPdf(pdf_path) -> dict
+# InventoryPdfDirectory(dirpath, manifest=None, workers=None, recursive=True) -> list[dict]
+#
+#   Gathers everything we need to plan a batch from ONE open of each file: page count, the DocInfo
+#   fields, whether a header has already been added (the _EXTENT_KEY marker, or failing that the legacy
+#   fanac.org-link check) and whether the document has a text layer. The record is a small, JSON-safe
+#   dict so it can go straight into a manifest:
+#
+#     path         -- the file's path, as given
+#     size, mtime  -- os.stat() size and mtime, so a manifest entry can be checked for staleness
+#     pages        -- page count (0 if the file could not be opened)
+#     info         -- the non-empty DocInfo fields (title, author, subject, keywords, ...)
+#     header_pts   -- points a previous AddPdfPageHeader added to page 1, or None if no header was found
+#                     (a legacy header with no marker reports _EXTRA, the single-line height it always had)
+#     legacy_header-- True if the header was found only by the legacy link check
+#     has_text     -- True if any page has extractable text
+#     error        -- None, or the reason the file could not be inventoried
+#
+#   InventoryPdfDirectory runs InventoryPdf over every .pdf in a directory on a process pool and, if
+#   `manifest` is given, writes the records to it as JSON Lines (one record per line) in path order.
+#   ReadPdfInventoryManifest reads such a manifest back.
+
+def InventoryPdf(pdf_path: str) -> dict:
+    rec = {"path": pdf_path, "size": None, "mtime": None, "pages": 0, "info": {},
+           "header_pts": None, "legacy_header": False, "has_text": False, "error": None}
+    try:
+        st = os.stat(pdf_path)
+        rec["size"], rec["mtime"] = st.st_size, st.st_mtime
+        fitz = _require_fitz()
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        rec["error"] = str(e)
+        return rec
+
+    try:
+        rec["pages"] = doc.page_count
+        rec["info"]  = {k: v for k, v in (doc.metadata or {}).items() if v and k not in ("format", "encryption")}
+        if doc.page_count > 0:
+            page = doc[0]
+            extent = _read_extent(doc, page)
+            if extent is None and _already_labeled(page, fitz):
+                extent = float(_EXTRA)
+                rec["legacy_header"] = True
+            rec["header_pts"] = extent
+        # Stop at the first page with any text: a text layer is a yes/no question, and on image-only scans
+        # (the expensive case) there is no early exit anyway.
+        for page in doc:
+            if page.get_text("text").strip():
+                rec["has_text"] = True
+                break
+    except Exception as e:
+        rec["error"] = str(e)
+    finally:
+        doc.close()
+    return rec
+
+
+def InventoryPdfDirectory(dirpath: str, manifest: str|None=None, workers: int|None=None, recursive: bool=True) -> list[dict]:
+    paths = []
+    if recursive:
+        for root, _, files in os.walk(dirpath):
+            paths.extend(os.path.join(root, f) for f in files if ExtensionMatches(f, ".pdf"))
+    else:
+        paths = [os.path.join(dirpath, f) for f in os.listdir(dirpath) if ExtensionMatches(f, ".pdf")]
+    paths.sort()
+
+    if workers == 1 or len(paths) < 2:
+        records = [InventoryPdf(p) for p in paths]
+    else:
+        # MuPDF work is CPU-bound and holds the GIL, so fan out across processes rather than threads.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(InventoryPdf, paths, chunksize=8))
+
+    for rec in records:
+        if rec["error"]:
+            LogError(f"InventoryPdfDirectory: '{rec['path']}': {rec['error']}")
+
+    if manifest is not None:
+        with open(manifest, "w", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False)+"\n")
+    return records
+
+
+def ReadPdfInventoryManifest(manifest: str) -> list[dict]:
+    records = []
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+# =============================================================================
+# Resumable batch header stamping
+#
+# AddPdfPageHeaderBatch(jobs, manifest, workers=None, **header_kw) -> dict
+#
+#   Runs AddPdfPageHeader over a job list on a process pool. Each job is a dict with keys
+#   "path", "format_string", "items" and optionally "logo" (bytes or path, as for AddPdfPageHeader).
+#   header_kw (presubset, adaptive_save, linearize, optimize, ...) is passed to every AddPdfPageHeader call.
+#
+#   Completion is recorded in `manifest`, an append-only JSON Lines file written (and flushed to disk)
+#   by the parent process as each job finishes: {"path", "job", "ok", "error", "seconds"}. "job" is a
+#   digest of the format string, items, logo and header_kw, so a rerun skips every file already stamped
+#   with the SAME header and redoes any whose header has changed. A file AddPdfPageHeader skips (no
+#   pages) is recorded as failed ("ok": false), not done. A crash or reboot therefore loses at most the
+#   jobs that were in flight; a truncated final manifest line is ignored.
+#
+#   Returns a summary dict: {"total", "skipped", "done", "failed", "seconds", "files_per_sec", "failures"}
+#   where "failures" is a list of (path, error). The summary is also logged.
+
+def _header_job_digest(job: dict, header_kw: dict) -> str:
+    logo = job.get("logo")
+    if logo is not None:
         try:
-            if os.path.exists(tmp_out):
-                os.remove(tmp_out)
-        except Exception:
-            pass
-        return
+            logo = repr(_logo_key(logo))
+        except OSError:
+            logo = repr(("missing", os.path.abspath(logo)))
+    payload = json.dumps([job["format_string"], [str(i) for i in job["items"]], logo,
+                          json.dumps(header_kw, sort_keys=True, default=str)], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _run_header_job(job: dict, header_kw: dict) -> tuple[str, str|None, float]:
+    # Top-level so it can be pickled to a worker process. Each worker keeps its own font/logo caches
+    # for its lifetime, so those costs are paid once per worker, not once per file.
+    start = time.perf_counter()
+    try:
+        stamped = AddPdfPageHeader(job["path"], job["format_string"], job["items"], logo=job.get("logo"), **header_kw)
+        err = None if stamped else "header not written (see the error log)"
+    except Exception as e:
+        err = f"{type(e).__name__}: {e}"
+    return job["path"], err, time.perf_counter() - start
+
+
+def _read_batch_manifest(manifest: str) -> set[tuple[str, str]]:
+    done = set()
+    if not os.path.exists(manifest):
+        return done
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue        # a line cut short by a crash mid-write
+            if rec.get("ok"):
+                done.add((os.path.normcase(os.path.abspath(rec["path"])), rec.get("job")))
+    return done
+
+
+def AddPdfPageHeaderBatch(jobs: list[dict], manifest: str, workers: int|None=None, **header_kw) -> dict:
+    start = time.perf_counter()
+    done = _read_batch_manifest(manifest)
+    todo = []
+    for job in jobs:
+        digest = _header_job_digest(job, header_kw)
+        if (os.path.normcase(os.path.abspath(job["path"])), digest) not in done:
+            todo.append((job, digest))
+    skipped = len(jobs) - len(todo)
+
+    failures: list[tuple[str, str]] = []
+    ndone = 0
+    with open(manifest, "a", encoding="utf-8") as mf:
+        def record(job, digest, err, secs):
+            mf.write(json.dumps({"path": job["path"], "job": digest, "ok": err is None, "error": err,
+                                 "seconds": round(secs, 3)}, ensure_ascii=False)+"\n")
+            mf.flush()
+            os.fsync(mf.fileno())
+
+        if workers == 1 or len(todo) < 2:
+            for job, digest in todo:
+                _, err, secs = _run_header_job(job, header_kw)
+                record(job, digest, err, secs)
+                if err:
+                    failures.append((job["path"], err))
+                else:
+                    ndone += 1
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_run_header_job, job, header_kw): (job, digest) for job, digest in todo}
+                for fut in as_completed(futures):
+                    job, digest = futures[fut]
+                    try:
+                        _, err, secs = fut.result()
+                    except Exception as e:      # the worker itself died (e.g. BrokenProcessPool)
+                        err, secs = f"{type(e).__name__}: {e}", 0.0
+                    record(job, digest, err, secs)
+                    if err:
+                        failures.append((job["path"], err))
+                    else:
+                        ndone += 1
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "total":         len(jobs),
+        "skipped":       skipped,
+        "done":          ndone,
+        "failed":        len(failures),
+        "seconds":       round(elapsed, 3),
+        "files_per_sec": round(ndone / elapsed, 2) if elapsed > 0 else 0.0,
+        "failures":      failures,
+    }
+    Log(f"AddPdfPageHeaderBatch: {ndone} stamped, {skipped} already done, {len(failures)} failed "
+        f"in {elapsed:.1f}s ({summary['files_per_sec']} files/s)")
+    for path, err in failures:
+        LogError(f"AddPdfPageHeaderBatch: '{path}': {err}")
+    return summary
+
+
+# =============================================================================
+# asyncio facade
+#
+#   await AddPdfPageHeaderAsync(pdf_path, format_string, items, logo=None, **kw)
+#   await AddStdMetadataAsync(filename, title="", author="", subject="", keywords="", **kw)
+#   await GetPdfPageCountAsync(pathname)
+#   await LowQualityScanAsync(pdf_path, **kw)          -- opens the reader itself (see OpenPdfReader)
+#
+#   Awaitable versions of the blocking entry points. The work runs on a process pool of at most
+#   SetPdfAsyncConcurrency(n) workers (default: the CPU count) -- processes, not threads, because PyMuPDF
+#   is not thread-safe -- so hundreds of PDF jobs can be in flight while the event loop gets on with other
+#   work. Lock retries don't block a worker with time.sleep: a worker that hits a locked file hands the job
+#   back at once, the wait happens on the event loop with asyncio.sleep (same backoff, jitter and deadline
+#   as RetryWithBackoff), and then only what is left is redone -- the whole call if the open was locked,
+#   just the final os.replace if the swap was. Workers inherit the scratch-dir setting current when the pool
+#   is created. ShutdownPdfAsync() releases the pool.
+_async_pool: ProcessPoolExecutor|None = None
+_async_workers: int|None = None
+
+
+def SetPdfAsyncConcurrency(workers: int|None) -> None:
+    global _async_workers
+    ShutdownPdfAsync()
+    _async_workers = workers
 
-    # Replace the original with the compact version, retrying past transient Windows file locks.
-    for attempt in range(6):
+
+def ShutdownPdfAsync() -> None:
+    global _async_pool
+    if _async_pool is not None:
+        _async_pool.shutdown(wait=False, cancel_futures=True)
+        _async_pool = None
+
+
+def _async_executor() -> ProcessPoolExecutor:
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = ProcessPoolExecutor(max_workers=_async_workers, initializer=SetPdfScratchDir, initargs=(_scratch_dir,))
+    return _async_pool
+
+
+def _async_call(fname: str, args: tuple, kwargs: dict, mode: str):
+    # Runs in a worker process. Returns ("ok", result) or ("later", resume) -- see _RetryLater.
+    _retry_local.mode = mode
+    try:
+        return "ok", globals()[fname](*args, **kwargs)
+    except _RetryLater as e:
+        return "later", e.resume
+    finally:
+        _retry_local.mode = None
+
+
+def _low_quality_scan_file(pdf_path: str, **kwargs) -> tuple[OcrQuality, dict]:
+    with OpenPdfReader(pdf_path) as reader:
+        return LowQualityScan(reader, **kwargs)
+
+
+async def _run_async(fname: str, args: tuple, kwargs: dict, done_result=None, failed_result=None):
+    """Run globals()[fname](*args, **kwargs) in the pool, doing any lock-retry waits on the event loop.
+    done_result/failed_result are what the sync function returns after a successful/abandoned swap."""
+    loop  = asyncio.get_running_loop()
+    start = loop.time()
+    delay = _RETRY_FIRST_DELAY
+    mode  = "defer"
+    _retry_stats["calls"] += 1
+    while True:
+        status, payload = await loop.run_in_executor(_async_executor(), _async_call, fname, args, kwargs, mode)
+        if status == "ok":
+            return payload
+        while True:
+            remaining = _RETRY_DEADLINE - (loop.time() - start)
+            if remaining <= 0:
+                _retry_stats["gave_up"] += 1
+                if payload is None:
+                    mode = "once"           # one last attempt, which gives up the way the sync call does
+                    break
+                _, tmp_out, dst, caller = payload
+                LogError(f"{caller}: could not replace '{dst}' with the updated copy (locked)")
+                _remove_quietly(tmp_out)
+                return failed_result
+            wait = min(delay * random.uniform(0.5, 1.0), remaining)
+            await asyncio.sleep(wait)
+            _retry_stats["retries"] += 1
+            _retry_stats["wait_ms"] += wait * 1000
+            delay = min(delay * 2, _RETRY_MAX_DELAY)
+            if payload is None:
+                break                       # redo the whole call
+            _, tmp_out, dst, caller = payload
+            try:
+                await asyncio.to_thread(os.replace, tmp_out, dst)
+                return done_result
+            except PermissionError:
+                continue
+
+
+async def AddPdfPageHeaderAsync(pdf_path: str, format_string: str, items: list, logo=None, **kwargs) -> bool:
+    return await _run_async("AddPdfPageHeader", (pdf_path, format_string, items, logo), kwargs, True, False)
+
+
+async def AddStdMetadataAsync(filename: str, title: str="", author: str="", subject: str="", keywords: str="", **kwargs) -> bool:
+    return await _run_async("AddStdMetadata", (filename, title, author, subject, keywords), kwargs, True, False)
+
+
+async def GetPdfPageCountAsync(pathname: str) -> int|None:
+    return await asyncio.get_running_loop().run_in_executor(_async_executor(), GetPdfPageCount, pathname)
+
+
+async def LowQualityScanAsync(pdf_path: str, **kwargs) -> tuple[OcrQuality, dict]:
+    return await asyncio.get_running_loop().run_in_executor(_async_executor(), functools.partial(_low_quality_scan_file, pdf_path, **kwargs))
+
+
+# =============================================================================
+# Shared OCR lexicon for worker processes
+#
+# Every process that runs LowQualityScan otherwise builds its own SpellChecker dictionary -- tens of MB and
+# seconds of startup each. Instead the parent builds the word list ONCE and publishes it as a compact hash
+# table in shared memory; workers attach to it read-only, so startup is near-instant and memory stays flat
+# however many workers there are:
+#
+#   lex = PublishOcrLexicon()              # parent; keep `lex` alive while the workers run
+#   pool = ProcessPoolExecutor(initializer=AttachOcrLexicon, initargs=(lex.name,))
+#   ...
+#   lex.Close(); lex.Unlink()              # parent, when the workers are done
+#
+# The table is open-addressed (linear probing, load factor <= 1/2) and stores only a 64-bit BLAKE2b hash of
+# each word: 8 bytes per slot, about 3 MB for pyspellchecker's English list, with a false "known" rate of
+# about one in 10^19 lookups. Lookups follow SpellChecker.unknown() (lower-cased, "nan" and overlong words
+# never reported), so LowQualityScan scores identically either way.
+class SharedLexicon:
+    _MAGIC  = b"FANLEX01"
+    _HEADER = 24            # magic (8) + slot count (8) + longest word length (8)
+
+    def __init__(self, shm, owner: bool):
+        self._shm   = shm
+        self._owner = owner
+        header      = bytes(shm.buf[:self._HEADER])
+        if header[:8] != self._MAGIC:
+            raise ValueError(f"SharedLexicon: '{shm.name}' is not a published lexicon")
+        self._nslots  = int.from_bytes(header[8:16], "little")
+        self._longest = int.from_bytes(header[16:24], "little")
+        self._mask    = self._nslots - 1
+        self._table   = shm.buf[self._HEADER:self._HEADER + 8 * self._nslots].cast("Q")
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @staticmethod
+    def _hash(word: str) -> int:
+        return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    # Build a lexicon from `words` (default: pyspellchecker's English dictionary) in a new shared memory block.
+    @classmethod
+    def Publish(cls, words=None, name: str|None=None) -> "SharedLexicon":
+        from multiprocessing import shared_memory
+        if words is None:
+            if _SpellChecker is None:
+                raise ImportError("SharedLexicon.Publish: pyspellchecker is not installed and no word list was given")
+            words = _SpellChecker().word_frequency.dictionary.keys()
+        words = {w.lower() for w in words}
+        nslots = 1
+        while nslots < 2 * max(len(words), 1):
+            nslots *= 2
+        shm = shared_memory.SharedMemory(create=True, size=cls._HEADER + 8 * nslots, name=name)
+        table = shm.buf[cls._HEADER:cls._HEADER + 8 * nslots].cast("Q")
+        mask = nslots - 1
+        for i in range(nslots):
+            table[i] = 0
+        for w in words:
+            h = cls._hash(w)
+            i = h & mask
+            while table[i] and table[i] != h:
+                i = (i + 1) & mask
+            table[i] = h
+        table.release()
+        longest = max((len(w) for w in words), default=0)
+        shm.buf[:cls._HEADER] = cls._MAGIC + nslots.to_bytes(8, "little") + longest.to_bytes(8, "little")
+        return cls(shm, owner=True)
+
+    # Attach read-only to a lexicon another process published under `name`.
+    @classmethod
+    def Attach(cls, name: str) -> "SharedLexicon":
+        from multiprocessing import shared_memory
         try:
-            os.replace(tmp_out, pdf_path)
-            return
-        except PermissionError:
-            if attempt == 5:
-                LogError(f"AddPdfPageHeader: could not replace '{pdf_path}' with the compact version (locked)")
+            shm = shared_memory.SharedMemory(name=name, track=False)      # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                # Before 3.13 an attaching process registers the block with its resource tracker, which would
+                # destroy it when this worker exits -- while the parent and other workers still use it.
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        return cls(shm, owner=False)
+
+    def __contains__(self, word: str) -> bool:
+        h = self._hash(word.lower())
+        i = h & self._mask
+        while True:
+            v = self._table[i]
+            if v == h:
+                return True
+            if v == 0:
+                return False
+            i = (i + 1) & self._mask
+
+    def __len__(self) -> int:
+        return sum(1 for v in self._table if v)
+
+    # Same contract as SpellChecker.unknown(): the (lower-cased) words that are not in the lexicon. Like
+    # SpellChecker it never reports a lone punctuation mark, a word too long to be a misspelling, or anything
+    # float() accepts ("12", "1e5", "1_000") -- except "nan", "inf" and "infinity", which it does check.
+    def unknown(self, words) -> set[str]:
+        out = set()
+        for w in words:
+            if (len(w) == 1 and w in string.punctuation) or len(w) > self._longest + 3:
+                continue
+            w = w.lower()
+            if w not in ("nan", "inf", "infinity"):
                 try:
-                    os.remove(tmp_out)
-                except Exception:
+                    float(w)
+                    continue
+                except ValueError:
                     pass
-                return
-            time.sleep(0.25)
+            if w not in self:
+                out.add(w)
+        return out
+
+    def Close(self) -> None:
+        self._table.release()
+        self._shm.close()
+
+    def Unlink(self) -> None:
+        if self._owner:
+            self._shm.unlink()
+
+
+def PublishOcrLexicon(words=None) -> SharedLexicon:
+    return SharedLexicon.Publish(words)
+
+
+# Make this process's LowQualityScan use the published lexicon `name` (e.g. as a pool initializer).
+def AttachOcrLexicon(name: str) -> None:
+    global _spell
+    _spell = SharedLexicon.Attach(name)
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import PDFHelpers
+
+
+# =============================================================================
+# Benchmark suite for PDFHelpers
+#
+# Generates synthetic PDFs locally with PyMuPDF -- no external corpus needed -- and measures the per-file
+# cost of the PDFHelpers entry points (LowQualityScanStreaming is LowQualityScan(streaming=True)) on each
+# document shape:
+#
+#   image_only   -- 4 pages, each a full-page 150 dpi grayscale scan with no text layer
+#   text_layer   -- 4 pages of plain English text (what LowQualityScan sees on a good OCR)
+#   rotated      -- 4 text pages with /Rotate 0, 90, 180 and 270
+#   many_pages   -- 300 text pages
+#   many_pages_objstm -- the same, saved with compressed object streams (as Acrobat and most scanners do)
+#   large_image  -- 1 page holding a 4000 x 5000 RGB image (a 600 dpi color scan)
+#
+# For each operation x shape it records wall time (median of --repeat runs, each on a fresh copy), the
+# peak RSS of the process that ran it, and the size of the file afterwards. Every operation x shape runs in
+# its own fresh worker process so peak RSS is attributable to it. Results are saved as JSON; --compare
+# checks a run against an earlier one and lists the regressions.
+#
+#   python PDFHelpersBenchmark.py --out bench.json [--repeat 3] [--compare baseline.json] [--tolerance 0.15]
+
+_HEADER_FORMAT = "{} #1, May 1952, by {}  --  from {}"
+_HEADER_ITEMS  = ["Benchmark Fanzine", "A. Fan", "https://fanac.org/conpubs/", "fanac.org"]
+
+_TEXT = ("The convention opened on Friday evening with a reception for the members, and the program "
+         "continued through Sunday afternoon with panels, readings, an auction and the business meeting. ")
+
+OPERATIONS = ["GetPdfPageCount", "LowQualityScan", "LowQualityScanStreaming", "AddStdMetadata", "AddPdfPageHeader"]
+SHAPES     = ["image_only", "text_layer", "rotated", "many_pages", "many_pages_objstm", "large_image"]
+
+
+# =============================================================================
+# Synthetic documents
+def _add_text_page(doc, fitz, rotation=0):
+    page = doc.new_page(width=612, height=792)
+    page.insert_textbox(fitz.Rect(54, 54, 558, 738), _TEXT * 12, fontsize=11, fontname="helv")
+    if rotation:
+        page.set_rotation(rotation)
+
+
+def _add_image_page(doc, fitz, w_px, h_px, colorspace, width_pt=612, height_pt=792):
+    # Random samples: they don't compress, so the image stream is as large as a real scan's would be.
+    n = 3 if colorspace is fitz.csRGB else 1
+    pix = fitz.Pixmap(colorspace, w_px, h_px, os.urandom(w_px * h_px * n), False)
+    page = doc.new_page(width=width_pt, height=height_pt)
+    page.insert_image(page.rect, pixmap=pix)
+
+
+def MakeSyntheticPdf(shape: str, path: str) -> str:
+    fitz = PDFHelpers._require_fitz()
+    doc = fitz.open()
+    if shape == "image_only":
+        for _ in range(4):
+            _add_image_page(doc, fitz, 1275, 1650, fitz.csGRAY)
+    elif shape == "text_layer":
+        for _ in range(4):
+            _add_text_page(doc, fitz)
+    elif shape == "rotated":
+        for rot in (0, 90, 180, 270):
+            _add_text_page(doc, fitz, rot)
+    elif shape in ("many_pages", "many_pages_objstm"):
+        for _ in range(300):
+            _add_text_page(doc, fitz)
+    elif shape == "large_image":
+        _add_image_page(doc, fitz, 4000, 5000, fitz.csRGB, 480, 600)
+    else:
+        doc.close()
+        raise ValueError(f"MakeSyntheticPdf: unknown shape '{shape}'")
+    doc.save(path, garbage=4, deflate=True, use_objstms=1 if shape == "many_pages_objstm" else 0)
+    doc.close()
+    return path
+
+
+# =============================================================================
+# Measurement (runs in a worker process)
+def _peak_rss_bytes() -> int|None:
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class _PMC(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+            pmc = _PMC()
+            pmc.cb = ctypes.sizeof(pmc)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+            return int(pmc.PeakWorkingSetSize)
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024     # macOS reports bytes, Linux KiB
+    except Exception:
+        return None
+
+
+def _run_operation(op: str, path: str) -> None:
+    if op == "GetPdfPageCount":
+        PDFHelpers.GetPdfPageCount(path)
+    elif op in ("LowQualityScan", "LowQualityScanStreaming"):
+        with open(path, "rb") as f:
+            PDFHelpers.LowQualityScan(PDFHelpers.PdfReader(f), label=os.path.basename(path),
+                                      streaming=op == "LowQualityScanStreaming")
+    elif op == "AddStdMetadata":
+        PDFHelpers.AddStdMetadata(path, title="Benchmark Fanzine #1", author="A. Fan", subject="Benchmark", keywords="fanzine")
+    elif op == "AddPdfPageHeader":
+        PDFHelpers.AddPdfPageHeader(path, _HEADER_FORMAT, _HEADER_ITEMS)
+    else:
+        raise ValueError(f"unknown operation '{op}'")
+
+
+def _measure(op: str, shape: str, src: str, workdir: str, repeat: int) -> dict:
+    rss_before = _peak_rss_bytes()
+    times, out_bytes, error = [], None, None
+    for i in range(repeat):
+        path = os.path.join(workdir, f"{op}-{shape}-{i}.pdf")
+        shutil.copyfile(src, path)      # the writers modify their input, so every run gets a fresh copy
+        start = time.perf_counter()
+        try:
+            _run_operation(op, path)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        times.append(time.perf_counter() - start)
+        out_bytes = os.path.getsize(path)
+        os.remove(path)
+    rss_after = _peak_rss_bytes()
+    return {
+        "op":             op,
+        "shape":          shape,
+        "in_bytes":       os.path.getsize(src),
+        "out_bytes":      out_bytes,
+        "seconds":        round(statistics.median(times), 5) if times else None,
+        "seconds_min":    round(min(times), 5) if times else None,
+        "runs":           len(times),
+        "peak_rss_mb":    round(rss_after / 2**20, 1) if rss_after else None,
+        "op_rss_mb":      round((rss_after - rss_before) / 2**20, 1) if rss_after and rss_before else None,
+        "error":          error,
+    }
+
+
+# =============================================================================
+# Run the whole suite. Returns the results document (also written to `out` if given).
+def RunPdfBenchmarks(out: str|None=None, repeat: int=3, operations: list[str]|None=None, shapes: list[str]|None=None) -> dict:
+    fitz = PDFHelpers._require_fitz()
+    operations = operations or OPERATIONS
+    shapes     = shapes or SHAPES
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pdfbench-") as workdir:
+        sources = {shape: MakeSyntheticPdf(shape, os.path.join(workdir, f"src-{shape}.pdf")) for shape in shapes}
+        for op in operations:
+            for shape in shapes:
+                # A fresh single-worker pool per measurement, so peak RSS belongs to this op x shape alone.
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    rec = pool.submit(_measure, op, shape, sources[shape], workdir, repeat).result()
+                results.append(rec)
+                print(_format_row(rec), flush=True)
+
+    doc = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "pymupdf":   getattr(fitz, "VersionBind", None),
+            "repeat":    repeat,
+        },
+        "results": results,
+    }
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    return doc
+
+
+def _format_row(rec: dict) -> str:
+    if rec["error"]:
+        return f"{rec['op']:<23} {rec['shape']:<17} ERROR {rec['error']}"
+    return (f"{rec['op']:<23} {rec['shape']:<17} {rec['seconds']*1000:10.1f} ms  "
+            f"peak {rec['peak_rss_mb']} MB  out {rec['out_bytes']:,} B")
+
+
+# =============================================================================
+# Compare two results documents (as returned by RunPdfBenchmarks, or the paths of their JSON files).
+# Returns a list of human-readable regressions: any op x shape that got slower, or whose output or peak
+# memory grew, by more than `tolerance` (a fraction).
+def ComparePdfBenchmarks(baseline: dict|str, current: dict|str, tolerance: float=0.15) -> list[str]:
+    if isinstance(baseline, str):
+        with open(baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if isinstance(current, str):
+        with open(current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+    old = {(r["op"], r["shape"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = old.get((r["op"], r["shape"]))
+        if b is None:
+            continue
+        for key, label in (("seconds", "time"), ("out_bytes", "output size"), ("peak_rss_mb", "peak RSS")):
+            if b.get(key) and r.get(key) and r[key] > b[key] * (1 + tolerance):
+                regressions.append(f"{r['op']} on {r['shape']}: {label} {b[key]} -> {r[key]} (+{100 * (r[key] / b[key] - 1):.0f}%)")
+        if r.get("error") and not b.get("error"):
+            regressions.append(f"{r['op']} on {r['shape']}: now fails: {r['error']}")
+    return regressions
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark PDFHelpers on synthetic PDFs.")
+    ap.add_argument("--out", default="bench_pdfhelpers.json", help="where to write the JSON results")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per operation x shape (median is reported)")
+    ap.add_argument("--ops", nargs="*", choices=OPERATIONS, help="operations to run (default: all)")
+    ap.add_argument("--shapes", nargs="*", choices=SHAPES, help="document shapes to use (default: all)")
+    ap.add_argument("--compare", help="baseline JSON to check this run against")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed fractional growth before flagging a regression")
+    args = ap.parse_args()
+
+    current = RunPdfBenchmarks(args.out, args.repeat, args.ops, args.shapes)
+    if args.compare:
+        regressions = ComparePdfBenchmarks(args.compare, current, args.tolerance)
+        for line in regressions:
+            print("REGRESSION: " + line)
+        sys.exit(1 if regressions else 0)
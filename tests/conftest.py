@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+# The helper modules import one another by bare name (from Log import Log), so the repo root goes on the path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _log_to_tmp(tmp_path_factory):
+    # Keep Log.txt / Log Errors.txt out of the working directory
+    import Log
+    d=tmp_path_factory.mktemp("log")
+    Log.LogOpen(str(d / "Log.txt"), str(d / "Log Errors.txt"))
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    # make_pdf(name, pages=1, text=None, width=612, height=792) -> path of a small PyMuPDF-built PDF
+    fitz=pytest.importorskip("fitz")
+
+    def make(name: str="in.pdf", pages: int=1, text: str|None=None, width: float=612, height: float=792) -> str:
+        doc=fitz.open()
+        for i in range(pages):
+            page=doc.new_page(width=width, height=height)
+            if text is not None:
+                page.insert_text((72, 144), f"{text} {i+1}", fontsize=12)
+        path=str(tmp_path / name)
+        doc.save(path)
+        doc.close()
+        return path
+    return make
+
+
+_TTF="/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+@pytest.fixture
+def ttf_font(monkeypatch):
+    # Stand a real TrueType font in for Calibri, which only exists on Windows. Returns the list LogError appends to.
+    pytest.importorskip("fitz")
+    import PDFHelpers
+    if not os.path.exists(_TTF):
+        pytest.skip("needs a TrueType font")
+    monkeypatch.setattr(PDFHelpers, "_FONT_FILE", _TTF)
+    monkeypatch.setattr(PDFHelpers, "_FONT_KW", {"fontname": PDFHelpers._FONT_NAME, "fontfile": _TTF})
+    monkeypatch.setattr(PDFHelpers, "_font_obj", None)
+    monkeypatch.setattr(PDFHelpers, "_subset_font_cache", {})
+    errors=[]
+    monkeypatch.setattr(PDFHelpers, "LogError", errors.append)
+    return errors
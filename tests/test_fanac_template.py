@@ -0,0 +1,68 @@
+import pytest
+
+import HelpersPackage
+from HelpersPackage import FanacTemplate
+
+_PAGE=("<html><head><title><!--title-->Old title<!--title--></title></head>\n"
+       "<body><!-- fanac-updated 2001-01-01 -->\n"
+       "<h1><!--title-->Old title<!--title--></h1>\n"
+       "<!-- fanac-rows start--><tr><td>old</td></tr><!-- fanac-rows end-->\n"
+       "<!-- an ordinary comment -->\n"
+       "<!-- fanac-footer start-->old footer<!-- fanac-footer end-->\n"
+       "</body></html>")
+
+
+@pytest.fixture
+def errors(monkeypatch):
+    errors=[]
+    monkeypatch.setattr(HelpersPackage, "LogError", errors.append)
+    return errors
+
+
+def test_parse_indexes_regions():
+    t=FanacTemplate(_PAGE)
+    assert str(t) == _PAGE
+    assert t.Regions == ["rows", "footer"]
+    assert t.Between == ["title"]
+    assert t.Payloads == ["updated"]
+    assert t.Region("ROWS") == HelpersPackage.ExtractHTMLUsingFanacStartEndCommentPair(_PAGE, "rows")
+    assert t.BetweenComments("title") == HelpersPackage.ExtractBetweenHTMLComments(_PAGE, "title")
+    assert t.Payload("updated") == HelpersPackage.ExtractInvisibleTextInsideFanacComment(_PAGE, "updated")
+    assert t.Region("missing") == t.BetweenComments("missing") == t.Payload("missing") == ""
+
+
+def test_render_matches_the_single_region_functions(errors):
+    expected=HelpersPackage.InsertHTMLUsingFanacStartEndCommentPair(_PAGE, "rows", "<tr><td>new</td></tr>")
+    expected=HelpersPackage.InsertHTMLUsingFanacStartEndCommentPair(expected, "footer", "")
+    expected=HelpersPackage.InsertBetweenHTMLComments(expected, "title", "New title")
+    expected=HelpersPackage.InsertInvisibleTextInsideFanacComment(expected, "updated", "2024-06-30")
+
+    t=FanacTemplate(_PAGE)
+    got=t.Render(regions={"rows": "<tr><td>new</td></tr>", "footer": ""}, between={"title": "New title"}, payloads={"updated": "2024-06-30"})
+    assert got == expected
+    assert str(t) == _PAGE      # Rendering leaves the template alone
+    assert errors == []
+
+
+def test_render_without_updates_returns_the_text():
+    t=FanacTemplate(_PAGE)
+    assert t.Render() is str(t)
+
+
+def test_render_logs_and_skips_unknown_tags(errors):
+    t=FanacTemplate(_PAGE)
+    got=t.Render(regions={"nosuch": "x", "rows": ""}, between={"nosuch": "x"}, payloads={"nosuch": "x"})
+    assert got == HelpersPackage.InsertHTMLUsingFanacStartEndCommentPair(_PAGE, "rows", "")
+    assert len(errors) == 3 and all("nosuch" in e for e in errors)
+
+
+def test_parse_caches_by_text(monkeypatch):
+    monkeypatch.setattr(FanacTemplate, "_cache", type(FanacTemplate._cache)())
+    monkeypatch.setattr(FanacTemplate, "_CACHE_MAX", 2)
+    a=FanacTemplate.Parse(_PAGE)
+    assert FanacTemplate.Parse(_PAGE) is a
+    FanacTemplate.Parse("<p>one</p>")
+    FanacTemplate.Parse(_PAGE)              # Touch a so that "one" is the oldest
+    FanacTemplate.Parse("<p>two</p>")
+    assert list(FanacTemplate._cache) == [_PAGE, "<p>two</p>"]
+    assert FanacTemplate.Parse(_PAGE) is a
@@ -0,0 +1,77 @@
+import importlib.util
+import re
+
+import pytest
+
+import HelpersPackage
+
+
+def test_codec_patterns_are_registered():
+    # Every pattern HelpersPackage compiles at import goes through the Regex() registry, so RegexCacheStats() sees it
+    registered=set(HelpersPackage._regexRegistry.values())
+    assert HelpersPackage._htmlEntityRegex in registered
+    HelpersPackage.DecodeHtmlText("a &amp; b")
+    fixed=HelpersPackage.RegexCacheStats()["fixed"]
+    HelpersPackage.DecodeHtmlText("c &lt; d")
+    assert HelpersPackage.RegexCacheStats()["fixed"] == fixed
+
+
+def test_every_compile_goes_through_the_registry(monkeypatch):
+    # Load a fresh copy of the module with re.compile counted: each compile, at import or in a helper, must be one
+    # the registry made and kept
+    calls=[]
+    compile=re.compile
+    monkeypatch.setattr(re, "compile", lambda pattern, flags=0: calls.append(pattern) or compile(pattern, flags))
+    spec=importlib.util.spec_from_file_location("_fresh_helpers", HelpersPackage.__file__)
+    fresh=importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(fresh)
+    assert calls == [p for p, _ in fresh._regexRegistry]
+
+    for _ in range(2):
+        fresh.DecodeHtmlText("caf&eacute; &amp; bar")
+        fresh.SearchAndReplace(r"(\d+)", "a1b22", "")
+    stats=fresh.RegexCacheStats()
+    assert len(calls) == stats["compiles"] == stats["fixed"] + stats["tagged"]
+    assert stats["hits"] > 0
+
+
+def test_patterns_are_reused(monkeypatch):
+    monkeypatch.setattr(HelpersPackage, "_regexStats", dict.fromkeys(HelpersPackage._regexStats, 0))
+    monkeypatch.setattr(HelpersPackage, "_regexRegistry", {})
+    monkeypatch.setattr(HelpersPackage, "_tagRegexCache", type(HelpersPackage._tagRegexCache)())
+    monkeypatch.setattr(HelpersPackage, "_TAG_REGEX_CACHE_MAX", 2)
+    r=HelpersPackage.Regex(r"x+", re.I)
+    assert HelpersPackage.Regex(r"x+", re.I) is r and HelpersPackage.Regex(r"x+") is not r
+
+    a=HelpersPackage.TagRegex("<a>")
+    assert HelpersPackage.TagRegex("<a>") is a and HelpersPackage.TagRegex(a) is a
+    HelpersPackage.TagRegex("<b>")
+    HelpersPackage.TagRegex("<a>")          # Touch <a> so that <b> is the oldest
+    HelpersPackage.TagRegex("<c>")
+    assert [p for p, _ in HelpersPackage._tagRegexCache] == ["<a>", "<c>"]
+    assert HelpersPackage.RegexCacheStats() == {"compiles": 5, "hits": 3, "evictions": 1, "fixed": 2, "tagged": 2}
+
+
+@pytest.mark.parametrize("s, expected", [
+    ("plain", "plain"),
+    ("  a > b ", "a &gt; b"),
+    ("caf&eacute; &amp; bar", "café &amp; bar"),
+    ("&#233;&#x41;", "éA"),
+    ("&lt;b&gt;", "&lt;b&gt;"),
+    ("a <b>bold</b>", None),
+    ("&foo;", None),
+    ("&#0;", None),
+])
+def test_decode_html_text(s, expected):
+    assert HelpersPackage.DecodeHtmlText(s) == expected
+
+
+@pytest.mark.parametrize("s, expected", [
+    ("plain", "plain"),
+    ("café & <bar>", "caf&eacute; &amp; &lt;bar&gt;"),
+    ("\xa0", "&nbsp;"),
+    ("≧̸", "&ngeqq;"),
+    ("≧", "&geqq;"),
+])
+def test_unicode_to_html_entities(s, expected):
+    assert HelpersPackage.UnicodeToHtmlEntities(s) == expected
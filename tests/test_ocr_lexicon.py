@@ -0,0 +1,42 @@
+import pytest
+
+spellchecker=pytest.importorskip("spellchecker")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+_WORDS=["the", "convention", "Fanzine", "xyzzyq", "teh", "nan", "NaN", "inf", "Infinity", "infinity",
+        "1e5", "3.14", "-2", "12", "1_000", "0x1f", "!", ",", "a", "I", "--", "Science-fiction",
+        "supercalifragilisticexpialidociousness", "x" * 40]
+
+
+@pytest.fixture(scope="module")
+def spell():
+    return spellchecker.SpellChecker()
+
+
+@pytest.fixture(scope="module")
+def lexicon(spell):
+    lex=PDFHelpers.SharedLexicon.Publish(spell.word_frequency.dictionary.keys())
+    yield lex
+    lex.Close()
+    lex.Unlink()
+
+
+def test_unknown_matches_spellchecker(spell, lexicon):
+    assert lexicon.unknown(_WORDS) == spell.unknown(_WORDS)
+    assert lexicon.unknown(w.lower() for w in _WORDS) == spell.unknown([w.lower() for w in _WORDS])
+
+
+def test_float_tokens_are_never_unknown(lexicon):
+    assert lexicon.unknown(["1e5", "2.5", "1_000", "-7"]) == set()
+    assert lexicon.unknown(["inf", "nan", "infinity"]) <= {"inf", "nan", "infinity"}
+
+
+def test_attach_sees_the_published_words(lexicon):
+    other=PDFHelpers.SharedLexicon.Attach(lexicon.name)
+    try:
+        assert "convention" in other and "xyzzyq" not in other
+        assert len(other) == len(lexicon)
+    finally:
+        other.Close()
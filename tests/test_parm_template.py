@@ -0,0 +1,49 @@
+import pytest
+
+import HelpersPackage
+from HelpersPackage import ApplyParmDictToString, CompileParmTemplate, ParmDict
+
+
+@pytest.fixture
+def parms():
+    p=ParmDict(CaseInsensitiveCompare=True)
+    p["name"]="Confluence 2022"
+    p["show"]="yes"
+    p["empty"]=""
+    return p
+
+
+@pytest.mark.parametrize("s, expected", [
+    ("Hello [name]!", "Hello Confluence 2022!"),
+    ("Hello [NAME]!", "Hello Confluence 2022!"),
+    ("[show visible text] end", "visible text end"),
+    ("[empty gone] [missing x] [missing]", "[empty gone] [missing x] [missing]"),
+    ("[name][show a][name]", "Confluence 2022aConfluence 2022"),
+    ("x]y[name]z", "x]yConfluence 2022z"),
+    ("no brackets", "no brackets"),
+    ("[name", "[name"),
+    ("", ""),
+])
+def test_apply_parm_dict(parms, s, expected):
+    # The text after the last placeholder is copied once: nothing is appended to it
+    assert ApplyParmDictToString(s, parms) == expected
+
+
+def test_template_renders_against_any_parm_dict(parms):
+    t=CompileParmTemplate("<h1>[name]</h1>[show <p>shown</p>]")
+    assert t.Render(parms) == "<h1>Confluence 2022</h1><p>shown</p>"
+    other=ParmDict()
+    other["name"]="Worldcon"
+    assert t.Render(other) == "<h1>Worldcon</h1>[show <p>shown</p>]"
+    assert t.Render(parms) == "<h1>Confluence 2022</h1><p>shown</p>"
+
+
+def test_templates_are_cached(monkeypatch):
+    monkeypatch.setattr(HelpersPackage, "_parmTemplates", type(HelpersPackage._parmTemplates)())
+    monkeypatch.setattr(HelpersPackage, "_PARM_TEMPLATES_MAX", 2)
+    a=CompileParmTemplate("[a]")
+    assert CompileParmTemplate("[a]") is a
+    CompileParmTemplate("[b]")
+    CompileParmTemplate("[a]")          # Touch [a] so that [b] is the oldest
+    CompileParmTemplate("[c]")
+    assert list(HelpersPackage._parmTemplates) == ["[a]", "[c]"]
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+@pytest.fixture
+def in_process(monkeypatch):
+    # Run the facade's jobs on a thread in this process, so the tests can see and patch what they do
+    pool=ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(PDFHelpers, "_async_executor", lambda: pool)
+    yield
+    pool.shutdown()
+
+
+def test_process_pool_round_trip(make_pdf):
+    path=make_pdf(pages=3, text="Body")
+    PDFHelpers.SetPdfAsyncConcurrency(1)
+
+    async def run():
+        count=await PDFHelpers.GetPdfPageCountAsync(path)
+        stamped=await PDFHelpers.AddPdfPageHeaderAsync(path, "Issue {}", ["1"])
+        titled=await PDFHelpers.AddStdMetadataAsync(path, title="Async")
+        quality, stats=await PDFHelpers.LowQualityScanAsync(path)
+        return count, stamped, titled, quality, stats
+
+    try:
+        count, stamped, titled, quality, stats=asyncio.run(run())
+    finally:
+        PDFHelpers.ShutdownPdfAsync()
+    assert (count, stamped, titled) == (3, True, True)
+    assert quality == PDFHelpers.OcrQuality.NOT_OCRED and "alpha" in stats
+    doc=fitz.open(path)
+    assert doc.metadata["title"] == "Async" and PDFHelpers._read_extent(doc, doc[0]) == PDFHelpers._EXTRA
+    doc.close()
+
+
+def test_locked_open_is_waited_out_on_the_loop(in_process, make_pdf, monkeypatch):
+    path=make_pdf(text="Body")
+    real=PDFHelpers._open_for_write
+    modes=[]
+
+    def locked_twice(fitz, p):
+        modes.append(getattr(PDFHelpers._retry_local, "mode", None))
+        if len(modes) <= 2:
+            raise PermissionError(13, "locked", p)
+        return real(fitz, p)
+
+    monkeypatch.setattr(PDFHelpers, "_open_for_write", locked_twice)
+    before=PDFHelpers.RetryStats()
+    assert asyncio.run(PDFHelpers.AddPdfPageHeaderAsync(path, "Issue {}", ["1"]))
+    # Every attempt ran in defer mode, handing the wait back to the event loop
+    assert modes == ["defer"] * 3
+    assert PDFHelpers.RetryStats()["retries"] == before["retries"] + 2
+
+
+def test_corrupt_file_fails_at_once(in_process, tmp_path):
+    bad=tmp_path / "bad.pdf"
+    bad.write_bytes(b"%PDF-1.4\nnot really a pdf at all")
+    start=time.monotonic()
+    with pytest.raises(RuntimeError):
+        asyncio.run(PDFHelpers.AddPdfPageHeaderAsync(str(bad), "Issue {}", ["1"]))
+    assert time.monotonic() - start < 1.0
+
+
+def test_locked_replace_is_retried_without_redoing_the_work(in_process, make_pdf, monkeypatch):
+    path=make_pdf(text="Body")
+    real_replace=PDFHelpers.os.replace
+    opens=[]
+    real_open=PDFHelpers._open_for_write
+    monkeypatch.setattr(PDFHelpers, "_open_for_write", lambda fitz, p: opens.append(p) or real_open(fitz, p))
+    fails=[2]
+
+    def flaky_replace(src, dst):
+        if fails[0]:
+            fails[0]-=1
+            raise PermissionError(13, "locked", dst)
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(PDFHelpers.os, "replace", flaky_replace)
+    assert asyncio.run(PDFHelpers.AddStdMetadataAsync(path, title="Swapped")) is True
+    assert len(opens) == 1
+    doc=fitz.open(path)
+    assert doc.metadata["title"] == "Swapped"
+    doc.close()
@@ -0,0 +1,75 @@
+import io
+import threading
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+@pytest.fixture
+def pool():
+    pool=PDFHelpers.EnablePdfHandlePool(max_handles=2)
+    yield pool
+    PDFHelpers.DisablePdfHandlePool()
+
+
+def _reader(path):
+    with PDFHelpers.OpenPdfReader(path) as reader:
+        return reader
+
+
+def test_reader_is_pooled_until_the_file_changes(pool, make_pdf):
+    path=make_pdf(pages=2, text="Body")
+    with PDFHelpers.OpenPdfReader(path) as first:
+        assert len(first.pages) == 2
+    # Leaving the block doesn't close a pooled reader: it is handed out again, still usable
+    with PDFHelpers.OpenPdfReader(path) as again:
+        assert again is first
+        assert len(again.pages) == 2
+    assert (pool.hits, pool.misses) == (1, 1)
+
+    assert PDFHelpers.AddStdMetadata(path, title="Changed")     # the writer evicts the path
+    assert _reader(path) is not first
+
+
+def test_pool_is_bounded(pool, make_pdf):
+    paths=[make_pdf(f"{i}.pdf") for i in range(3)]
+    readers=[_reader(p) for p in paths]
+    assert _reader(paths[2]) is readers[2]
+    assert _reader(paths[0]) is not readers[0]      # least recently used went first
+
+
+def test_page_count_uses_but_does_not_fill_the_pool(pool, make_pdf):
+    path=make_pdf(pages=3)
+    assert PDFHelpers.GetPdfPageCount(path) == 3
+    assert pool.Cached(path) is None                # counting didn't copy the file into the pool
+    reader=_reader(path)
+    assert PDFHelpers.GetPdfPageCount(path) == 3
+    assert pool.Cached(path) is reader
+
+
+def test_counters_are_consistent_across_threads(pool, make_pdf):
+    path=make_pdf()
+    _reader(path)
+
+    def work():
+        for _ in range(200):
+            _reader(path)
+
+    threads=[threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert pool.hits + pool.misses == 1 + 8 * 200
+
+
+def test_unpooled_reader_streams_from_the_file_and_closes_it(make_pdf):
+    PDFHelpers.DisablePdfHandlePool()
+    path=make_pdf(pages=3)
+    with PDFHelpers.OpenPdfReader(path) as reader:
+        assert not isinstance(reader.stream, io.BytesIO)
+        assert len(reader.pages) == 3
+    assert reader.stream.closed
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+def _records(manifest):
+    with open(manifest, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_resumes_and_skips_done_files(make_pdf, tmp_path):
+    jobs=[{"path": make_pdf(f"{i}.pdf"), "format_string": "Issue {}", "items": [str(i)]} for i in range(3)]
+    manifest=str(tmp_path / "batch.jsonl")
+
+    first=PDFHelpers.AddPdfPageHeaderBatch(jobs, manifest, workers=1)
+    assert (first["done"], first["skipped"], first["failed"]) == (3, 0, 0)
+    second=PDFHelpers.AddPdfPageHeaderBatch(jobs, manifest, workers=1)
+    assert (second["done"], second["skipped"]) == (0, 3)
+
+
+def test_digest_covers_logo_and_header_kw(tmp_path):
+    job={"path": "x.pdf", "format_string": "Issue {}", "items": ["1"]}
+    base=PDFHelpers._header_job_digest(job, {})
+    assert PDFHelpers._header_job_digest(job, {"presubset": False}) != base
+    assert PDFHelpers._header_job_digest(job, {"linearize": True, "presubset": True}) == \
+           PDFHelpers._header_job_digest(job, {"presubset": True, "linearize": True})
+    assert PDFHelpers._header_job_digest(dict(job, logo=b"one"), {}) != PDFHelpers._header_job_digest(dict(job, logo=b"two"), {})
+
+    logo=tmp_path / "logo.png"
+    logo.write_bytes(b"first")
+    before=PDFHelpers._header_job_digest(dict(job, logo=str(logo)), {})
+    logo.write_bytes(b"second, longer")
+    assert PDFHelpers._header_job_digest(dict(job, logo=str(logo)), {}) != before
+
+
+def test_empty_file_is_not_recorded_done(tmp_path, monkeypatch):
+    monkeypatch.setattr(PDFHelpers, "LogError", lambda *a, **k: None)
+    path=str(tmp_path / "empty.pdf")
+    # MuPDF refuses to save a document with no pages, so write one by hand
+    objs=[b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [] /Count 0 >>"]
+    out=bytearray(b"%PDF-1.4\n")
+    offsets=[]
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out+=b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref=len(out)
+    out+=b"xref\n0 3\n0000000000 65535 f \n"+b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out+=b"trailer\n<< /Size 3 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref
+    with open(path, "wb") as f:
+        f.write(out)
+
+    manifest=str(tmp_path / "batch.jsonl")
+    jobs=[{"path": path, "format_string": "Issue {}", "items": ["1"]}]
+    summary=PDFHelpers.AddPdfPageHeaderBatch(jobs, manifest, workers=1)
+    assert summary["failed"] == 1 and summary["done"] == 0
+    assert [r["ok"] for r in _records(manifest)] == [False]
+    assert PDFHelpers.AddPdfPageHeaderBatch(jobs, manifest, workers=1)["skipped"] == 0
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+def _header_font_size(path):
+    doc=fitz.open(path)
+    try:
+        fonts=[f for f in doc.get_page_fonts(0) if f[4] == PDFHelpers._FONT_NAME]
+        assert len(fonts) == 1
+        return len(doc.extract_font(fonts[0][0])[3])
+    finally:
+        doc.close()
+
+
+def test_subset_keeps_a_usable_cmap(ttf_font):
+    data=PDFHelpers._subset_font_bytes(fitz, "Fanzine — 1953")
+    assert data is not None and ttf_font == []
+    sub=fitz.Font(fontbuffer=data)
+    assert all(sub.has_glyph(ord(c)) for c in PDFHelpers._SUBSET_BASE_CHARS if not c.isspace())
+    assert len(data) < os.path.getsize(PDFHelpers._FONT_FILE) / 4
+    # Cached per extra character set
+    assert PDFHelpers._subset_font_bytes(fitz, "Fanzine — 1954") is data
+
+
+def test_presubset_header_embeds_the_small_font(ttf_font, make_pdf):
+    path=make_pdf(text="Body")
+    PDFHelpers.AddPdfPageHeader(path, "Fanzine — {}", ["Title"], presubset=True)
+    assert ttf_font == []
+    assert PDFHelpers._subset_font_cache[frozenset()] is not None
+    assert _header_font_size(path) < os.path.getsize(PDFHelpers._FONT_FILE) / 4
+
+    doc=fitz.open(path)
+    assert "Fanzine — Title" in doc[0].get_text()
+    doc.close()
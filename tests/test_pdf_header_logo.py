@@ -0,0 +1,81 @@
+import io
+import os
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+Image=pytest.importorskip("PIL.Image")
+
+import PDFHelpers
+
+
+@pytest.fixture
+def logo_caches(monkeypatch):
+    # Empty logo caches, with every decode counted. Returns the list of decodes.
+    monkeypatch.setattr(PDFHelpers, "_logo_images", {})
+    monkeypatch.setattr(PDFHelpers, "_logo_png_cache", {})
+    monkeypatch.setattr(PDFHelpers, "_logo_disabled", False)
+    decodes=[]
+    open_=Image.open
+    monkeypatch.setattr(Image, "open", lambda fp, *args, **kw: decodes.append(fp) or open_(fp, *args, **kw))
+    return decodes
+
+
+def _png(size, color) -> bytes:
+    buf=io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _logo_stream(path) -> bytes:
+    with fitz.open(path) as doc:
+        images=doc[0].get_images()
+        assert len(images) == 1
+        return doc.xref_stream_raw(images[0][0])
+
+
+def test_a_batch_decodes_and_processes_its_logo_once(logo_caches, make_pdf):
+    logo=_png((400, 200), (255, 0, 0))
+    paths=[make_pdf(name=f"{n}.pdf", text="Body") for n in range(3)]
+    for path in paths:
+        assert PDFHelpers.AddPdfPageHeader(path, "Issue {}", ["1"], logo=logo)
+    assert len(logo_caches) == 1
+    assert len(PDFHelpers._logo_images) == len(PDFHelpers._logo_png_cache) == 1
+    # Every file carries the same downsampled image bytes, and the cached original was not shrunk by thumbnail()
+    streams={_logo_stream(path) for path in paths}
+    assert len(streams) == 1
+    (im,)=PDFHelpers._logo_images.values()
+    assert im.size == (400, 200)
+    (png,)=PDFHelpers._logo_png_cache.values()
+    assert max(Image.open(io.BytesIO(png)).size) < 400
+
+
+def test_rotation_gets_its_own_raster(logo_caches, tmp_path):
+    logo=_png((40, 20), (0, 0, 255))
+    for rot in (0, 90):
+        doc=fitz.open()
+        doc.new_page(width=400, height=600).set_rotation(rot)
+        path=str(tmp_path / f"r{rot}.pdf")
+        doc.save(path)
+        doc.close()
+        assert PDFHelpers.AddPdfPageHeader(path, "Issue {}", ["1"], logo=logo)
+    assert len(logo_caches) == 1
+    assert sorted(rot for _, _, rot in PDFHelpers._logo_png_cache) == [0, 90]
+
+
+def test_an_edited_logo_file_is_picked_up(logo_caches, make_pdf, tmp_path):
+    logo=str(tmp_path / "logo.png")
+    with open(logo, "wb") as f:
+        f.write(_png((40, 20), (255, 0, 0)))
+    first=make_pdf(name="first.pdf")
+    assert PDFHelpers.AddPdfPageHeader(first, "Issue {}", ["1"], logo=logo)
+
+    with open(logo, "wb") as f:
+        f.write(_png((40, 20), (0, 255, 0)))
+    st=os.stat(logo)
+    os.utime(logo, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))   # a new mtime even on a coarse clock
+    second=make_pdf(name="second.pdf")
+    assert PDFHelpers.AddPdfPageHeader(second, "Issue {}", ["1"], logo=logo)
+    assert len(logo_caches) == 2
+    assert _logo_stream(first) != _logo_stream(second)
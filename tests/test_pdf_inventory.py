@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+def test_inventory_fresh_file(make_pdf):
+    path=make_pdf(pages=3, text="Hello")
+    rec=PDFHelpers.InventoryPdf(path)
+    assert rec["error"] is None
+    assert rec["pages"] == 3
+    assert rec["has_text"] is True
+    assert rec["header_pts"] is None and rec["legacy_header"] is False
+    assert rec["size"] == os.path.getsize(path)
+
+
+def test_inventory_image_only_has_no_text(make_pdf):
+    rec=PDFHelpers.InventoryPdf(make_pdf(pages=2))
+    assert rec["pages"] == 2 and rec["has_text"] is False
+
+
+def test_inventory_sees_header_marker(make_pdf):
+    path=make_pdf(text="Body")
+    PDFHelpers.AddPdfPageHeader(path, "Fanzine {}", ["Title"])
+    rec=PDFHelpers.InventoryPdf(path)
+    assert rec["header_pts"] == PDFHelpers._EXTRA
+    assert rec["legacy_header"] is False
+
+
+def test_inventory_reports_unreadable_file(tmp_path):
+    bad=tmp_path / "bad.pdf"
+    bad.write_bytes(b"this is not a pdf")
+    rec=PDFHelpers.InventoryPdf(str(bad))
+    assert rec["error"] and rec["pages"] == 0
+
+    rec=PDFHelpers.InventoryPdf(str(tmp_path / "missing.pdf"))
+    assert rec["error"] and rec["size"] is None
+
+
+def test_inventory_directory_manifest_round_trip(make_pdf, tmp_path):
+    os.makedirs(tmp_path / "sub")
+    a=make_pdf("a.pdf", text="A")
+    b=make_pdf(os.path.join("sub", "b.pdf"), pages=2)
+    (tmp_path / "notes.txt").write_text("not a pdf")
+    manifest=str(tmp_path / "inventory.jsonl")
+
+    records=PDFHelpers.InventoryPdfDirectory(str(tmp_path), manifest=manifest, workers=1)
+    assert [r["path"] for r in records] == sorted([a, b])
+    assert PDFHelpers.ReadPdfInventoryManifest(manifest) == records
+
+    flat=PDFHelpers.InventoryPdfDirectory(str(tmp_path), workers=1, recursive=False)
+    assert [r["path"] for r in flat] == [a]
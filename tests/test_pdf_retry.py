@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+def test_retry_waits_out_permission_errors():
+    calls=[]
+
+    def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise PermissionError("locked")
+        return "opened"
+
+    before=PDFHelpers.RetryStats()
+    assert PDFHelpers.RetryWithBackoff(fn) == "opened"
+    after=PDFHelpers.RetryStats()
+    assert len(calls) == 3
+    assert after["retries"] == before["retries"] + 2
+
+
+def test_retry_gives_up_at_the_deadline():
+    def fn():
+        raise PermissionError("locked")
+
+    start=time.monotonic()
+    with pytest.raises(PermissionError):
+        PDFHelpers.RetryWithBackoff(fn, deadline=0.2)
+    assert time.monotonic() - start < 1.0
+
+
+def test_retry_does_not_catch_other_errors():
+    calls=[]
+
+    def fn():
+        calls.append(1)
+        raise ValueError("corrupt")
+
+    with pytest.raises(ValueError):
+        PDFHelpers.RetryWithBackoff(fn)
+    assert len(calls) == 1
+
+
+def test_header_retries_a_locked_open(make_pdf, monkeypatch):
+    path=make_pdf(text="Body")
+    real=PDFHelpers._open_for_write
+    calls=[]
+
+    def locked_twice(fitz, p):
+        calls.append(p)
+        if len(calls) <= 2:
+            raise PermissionError(13, "The process cannot access the file", p)
+        return real(fitz, p)
+
+    monkeypatch.setattr(PDFHelpers, "_open_for_write", locked_twice)
+    assert PDFHelpers.AddPdfPageHeader(path, "Issue {}", ["1"])
+    assert len(calls) == 3
+
+
+def test_header_fails_fast_on_a_corrupt_file(tmp_path):
+    pytest.importorskip("fitz")
+    bad=tmp_path / "bad.pdf"
+    bad.write_bytes(b"%PDF-1.4\nnot really a pdf at all")
+    before=PDFHelpers.RetryStats()
+    start=time.monotonic()
+    with pytest.raises(RuntimeError):
+        PDFHelpers.AddPdfPageHeader(str(bad), "Issue {}", ["1"])
+    assert time.monotonic() - start < 1.0
+    assert PDFHelpers.RetryStats()["retries"] == before["retries"]
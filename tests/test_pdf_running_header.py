@@ -0,0 +1,109 @@
+import io
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+_FMT="{} #1 -- from {}"
+_ITEMS=["Fanzine", "https://fanac.org/", "fanac.org"]
+
+
+def _stamped(path):
+    doc=fitz.open(path)
+    try:
+        return [(PDFHelpers._read_extent(doc, page), [l.get("uri") for l in page.get_links()], page.get_text())
+                for page in doc]
+    finally:
+        doc.close()
+
+
+def test_all_pages_get_marker_and_links(ttf_font, make_pdf):
+    path=make_pdf(pages=4, text="Body")
+    assert PDFHelpers.AddPdfPageHeader(path, _FMT, _ITEMS, pages="all")
+    for extent, uris, text in _stamped(path):
+        assert extent == PDFHelpers._EXTRA
+        assert uris == ["https://fanac.org/"]
+        assert "Fanzine #1 -- from fanac.org" in text
+    assert ttf_font == []
+
+
+def test_all_pages_with_presubset_font(ttf_font, make_pdf):
+    path=make_pdf(pages=3)
+    assert PDFHelpers.AddPdfPageHeader(path, _FMT, _ITEMS, pages="all", presubset=True)
+    assert ttf_font == []
+    assert all("Fanzine #1 -- from fanac.org" in text for _, _, text in _stamped(path))
+
+
+def _header_words(page):
+    # The words drawn in the header band, in display coordinates
+    band=PDFHelpers._read_extent(page.parent, page)
+    words=[(fitz.Rect(w[:4]) * page.rotation_matrix, w[4]) for w in page.get_text("words")]
+    return [text for r, text in words if band and r.y0 >= 0 and r.y1 <= band]
+
+
+def test_page_list_and_restamp(make_pdf):
+    # No ttf_font: this runs on the module's own Helvetica fallback
+    path=make_pdf(pages=4, text="Body")
+    assert PDFHelpers.AddPdfPageHeader(path, _FMT, _ITEMS, pages=[2, 0, 2])
+    assert [extent for extent, _, _ in _stamped(path)] == [PDFHelpers._EXTRA, None, PDFHelpers._EXTRA, None]
+    with fitz.open(path) as doc:
+        assert [" ".join(_header_words(page)) for page in doc] == ["Fanzine #1 -- from fanac.org", "", "Fanzine #1 -- from fanac.org", ""]
+
+    # Restamping replaces the header rather than adding a second one or growing the page again
+    height=fitz.open(path)[0].rect.height
+    assert PDFHelpers.AddPdfPageHeader(path, _FMT, _ITEMS, pages="ALL")
+    doc=fitz.open(path)
+    assert doc[0].rect.height == height
+    # (A replaced header is painted out, not deleted, so pages 0 and 2 still hold the old words underneath)
+    assert all(" ".join(_header_words(page)).endswith("Fanzine #1 -- from fanac.org") for page in doc)
+    doc.close()
+    assert all(uris == ["https://fanac.org/"] for _, uris, _ in _stamped(path))
+
+
+@pytest.mark.parametrize("pages", ["1", "first", [0, 4], [-1], [0.0]])
+def test_bad_page_lists_are_rejected(make_pdf, pages):
+    path=make_pdf(pages=4)
+    with open(path, "rb") as f:
+        before=f.read()
+    with pytest.raises(ValueError):
+        PDFHelpers.AddPdfPageHeader(path, _FMT, _ITEMS, pages=pages)
+    with open(path, "rb") as f:
+        assert f.read() == before
+
+
+def _logo_rows(page):
+    # The display rows holding the (pure red) test logo
+    pix=page.get_pixmap(dpi=72)
+    return {y for y in range(pix.height) for x in range(0, pix.width, 2) if pix.pixel(x, y)[:3] == (255, 0, 0)}
+
+
+@pytest.mark.parametrize("ttf", [False, True])
+@pytest.mark.parametrize("pages", [None, "all"])
+def test_rotated_pages(request, tmp_path, pages, ttf):
+    Image=pytest.importorskip("PIL.Image")
+    if ttf:
+        request.getfixturevalue("ttf_font")
+    buf=io.BytesIO()
+    Image.new("RGB", (40, 20), (255, 0, 0)).save(buf, "PNG")
+    paths=[]
+    for rot in (0, 90, 180, 270):
+        doc=fitz.open()
+        page=doc.new_page(width=400, height=600)
+        page.set_rotation(rot)
+        paths.append(str(tmp_path / f"r{rot}.pdf"))
+        doc.save(paths[-1])
+        doc.close()
+        assert PDFHelpers.AddPdfPageHeader(paths[-1], _FMT, _ITEMS, logo=buf.getvalue(), pages=pages)
+
+    for path in paths:
+        with fitz.open(path) as doc:
+            page=doc[0]
+            # The header lands in the band added at the displayed top, whichever edge of the MediaBox that is
+            assert PDFHelpers._read_extent(doc, page) == PDFHelpers._EXTRA
+            assert " ".join(_header_words(page)) == "Fanzine #1 -- from fanac.org"
+            rows=_logo_rows(page)
+            assert rows and min(rows) >= 0 and max(rows) < PDFHelpers._EXTRA
+            assert [l["uri"] for l in page.get_links()] == ["https://fanac.org/"]
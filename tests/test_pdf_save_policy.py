@@ -0,0 +1,153 @@
+import os
+import random
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+class _Doc:
+    def __init__(self, incremental: bool=True):
+        self.incremental=incremental
+
+    def can_save_incrementally(self) -> bool:
+        return self.incremental
+
+
+def _sized_file(tmp_path, size: int) -> str:
+    path=str(tmp_path / f"{size}.pdf")
+    with open(path, "wb") as f:
+        f.truncate(size)        # sparse: no real disk use
+    return path
+
+
+@pytest.mark.parametrize("size, mode", [
+    (1024, "full"),
+    (PDFHelpers._INCREMENTAL_SAVE_BYTES - 1, "full"),
+    (PDFHelpers._INCREMENTAL_SAVE_BYTES, "incremental"),
+    (PDFHelpers._INCREMENTAL_SAVE_BYTES + 1, "incremental"),
+])
+def test_save_mode_threshold(tmp_path, size, mode):
+    assert PDFHelpers._save_mode(_Doc(), _sized_file(tmp_path, size), True) == mode
+
+
+def test_save_mode_full_when_asked_or_unable(tmp_path):
+    big=_sized_file(tmp_path, PDFHelpers._INCREMENTAL_SAVE_BYTES)
+    assert PDFHelpers._save_mode(_Doc(), big, False) == "full"
+    assert PDFHelpers._save_mode(_Doc(), big, True, rewrite=True) == "full"
+    assert PDFHelpers._save_mode(_Doc(incremental=False), big, True) == "full"
+    assert PDFHelpers._save_mode(_Doc(), str(tmp_path / "missing.pdf"), True) == "full"
+
+
+def test_restamping_a_small_file_leaves_no_dead_bytes(make_pdf):
+    pytest.importorskip("fitz")
+    path=make_pdf(text="Body")
+    for n in range(4):
+        PDFHelpers.AddPdfPageHeader(path, "Issue {}", [str(n)])
+    # Every save was a full rewrite: one xref section, no appended updates holding superseded headers
+    with open(path, "rb") as f:
+        assert f.read().count(b"startxref") == 1
+
+
+def test_metadata_on_a_small_file_is_rewritten_compactly(make_pdf):
+    pytest.importorskip("fitz")
+    path=make_pdf(text="Body")
+    before=PDFHelpers.PdfSaveStats()
+    assert PDFHelpers.AddStdMetadata(path, title="A title", author="An author")
+    after=PDFHelpers.PdfSaveStats()
+    assert after["full"] == before["full"] + 1
+    assert after["incremental"] == before["incremental"]
+
+
+def test_linearize_writes_a_fast_web_view_file(make_pdf):
+    fitz=pytest.importorskip("fitz")
+    pytest.importorskip("pikepdf")
+    for write in (lambda path: PDFHelpers.AddPdfPageHeader(path, "Issue {}", ["1"], linearize=True),
+                  lambda path: PDFHelpers.AddStdMetadata(path, title="A title", linearize=True),
+                  lambda path: PDFHelpers.CompactPdf(path, linearize=True, optimize=PDFHelpers.PDF_SIZE_PROFILE)):
+        path=make_pdf(pages=3, text="Body")
+        before=PDFHelpers.PdfSaveStats()["linear"]
+        assert write(path)
+        assert PDFHelpers.PdfSaveStats()["linear"] == before + 1
+        with fitz.open(path) as doc:
+            assert doc.is_fast_webaccess
+            assert doc.page_count == 3
+        assert not os.path.exists(path + ".min.pdf.lin.pdf")
+
+
+def test_without_pikepdf_linearize_is_logged_once(monkeypatch, make_pdf):
+    fitz=pytest.importorskip("fitz")
+    errors=[]
+    monkeypatch.setattr(PDFHelpers, "_pikepdf", None)
+    monkeypatch.setattr(PDFHelpers, "_linear_unsupported", False)
+    monkeypatch.setattr(PDFHelpers, "LogError", errors.append)
+    for _ in range(2):
+        path=make_pdf(text="Body")
+        assert PDFHelpers.CompactPdf(path, linearize=True)
+        with fitz.open(path) as doc:
+            assert not doc.is_fast_webaccess
+    assert len(errors) == 1 and "pikepdf" in errors[0]
+
+
+def test_append_metadata_keeps_the_existing_bytes_and_compact_drops_the_dead_ones(make_pdf):
+    fitz=pytest.importorskip("fitz")
+    path=make_pdf(pages=2, text="Body")
+    with fitz.open(path) as doc:
+        doc.set_metadata({"title": "Scanner title", "author": "An author"})
+        doc.set_xml_metadata("<x:xmpmeta xmlns:x='adobe:ns:meta/'>" + "<!-- scanner padding -->" * 2000 + "</x:xmpmeta>")
+        doc.save(path + ".tmp", garbage=4, deflate=False)
+    os.replace(path + ".tmp", path)
+    with open(path, "rb") as f:
+        original=f.read()
+
+    before=PDFHelpers.PdfSaveStats()
+    assert PDFHelpers.AppendStdMetadata(path, title="A title")
+    assert PDFHelpers.PdfSaveStats()["incremental"] == before["incremental"] + 1
+    with open(path, "rb") as f:
+        appended=f.read()
+    # Only an update section was appended: the original bytes (the unlinked XMP packet among them) are untouched
+    assert appended.startswith(original) and len(appended) - len(original) < 4096
+    with fitz.open(path) as doc:
+        assert (doc.metadata["title"], doc.metadata["author"]) == ("A title", "An author")
+        assert doc.get_xml_metadata() == ""
+
+    assert PDFHelpers.CompactPdf(path)
+    assert os.path.getsize(path) < len(original)
+    with open(path, "rb") as f:
+        assert f.read().count(b"startxref") == 1
+    with fitz.open(path) as doc:
+        assert (doc.metadata["title"], doc.metadata["author"]) == ("A title", "An author")
+        assert doc.page_count == 2
+
+
+def test_optimize_profile_shrinks_an_oversized_scan(tmp_path):
+    fitz=pytest.importorskip("fitz")
+    Image=pytest.importorskip("PIL.Image")
+    if not hasattr(fitz.Document, "rewrite_images"):
+        pytest.skip("needs PyMuPDF 1.25+")
+    # A noisy 1200 dpi "scan", stored losslessly: what an over-eager scanner writes
+    rnd=random.Random(3)
+    im=Image.frombytes("L", (1200, 1200), bytes(rnd.randrange(64, 192) for _ in range(1200 * 1200)))
+    png=str(tmp_path / "scan.png")
+    im.save(png)
+    path=str(tmp_path / "scan.pdf")
+    doc=fitz.open()
+    doc.new_page(width=72, height=72).insert_image(fitz.Rect(0, 0, 72, 72), filename=png)
+    doc.save(path)
+    doc.close()
+
+    before=PDFHelpers.PdfSaveStats()
+    sizes=PDFHelpers.OptimizePdf(path)
+    assert sizes == {"before": sizes["before"], "after": os.path.getsize(path)}
+    assert sizes["after"] < sizes["before"] / 4
+    after=PDFHelpers.PdfSaveStats()
+    assert after["optimized"] == before["optimized"] + 1
+    assert after["opt_bytes_in"] - before["opt_bytes_in"] == sizes["before"]
+    assert after["opt_bytes_out"] - before["opt_bytes_out"] == sizes["after"]
+    with fitz.open(path) as doc:
+        images=doc[0].get_images()
+        assert len(images) == 1
+        # Downsampled to no more than the profile's cap on the 1-inch page
+        assert doc.extract_image(images[0][0])["width"] <= PDFHelpers.PDF_SIZE_PROFILE["max_dpi"]
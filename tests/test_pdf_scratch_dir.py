@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+import PDFHelpers
+
+
+@pytest.fixture
+def scratch(monkeypatch, tmp_path):
+    # Stage compact saves in a scratch dir for this test only. Returns (scratch dir, list of the paths saved to).
+    monkeypatch.setattr(PDFHelpers, "_scratch_dir", None)
+    d=str(tmp_path / "scratch" / "pdf")
+    PDFHelpers.SetPdfScratchDir(d)
+    assert os.path.isdir(d)
+    saved=[]
+    save_doc=PDFHelpers._save_doc
+
+    def spy(doc, tmp_out, *args, **kw):
+        saved.append(tmp_out)
+        return save_doc(doc, tmp_out, *args, **kw)
+    monkeypatch.setattr(PDFHelpers, "_save_doc", spy)
+    return d, saved
+
+
+def test_compact_save_is_staged_in_the_scratch_dir(scratch, make_pdf):
+    d, saved=scratch
+    path=make_pdf(pages=2, text="Body")
+    assert PDFHelpers.AddStdMetadata(path, title="A title")
+    assert len(saved) == 1 and os.path.dirname(saved[0]) == d
+    assert os.path.basename(saved[0]).endswith(os.path.basename(path) + ".min.pdf")
+    with fitz.open(path) as doc:
+        assert doc.metadata["title"] == "A title" and doc.page_count == 2
+    # Nothing is left behind, either in scratch or beside the file
+    assert os.listdir(d) == []
+    assert sorted(os.listdir(os.path.dirname(path))) == ["in.pdf", "scratch"]
+
+
+def test_same_name_in_two_folders_gets_two_scratch_files(scratch, tmp_path):
+    a, b=str(tmp_path / "a" / "x.pdf"), str(tmp_path / "b" / "x.pdf")
+    assert PDFHelpers._tmp_path(a) != PDFHelpers._tmp_path(b)
+    PDFHelpers.SetPdfScratchDir(None)
+    assert PDFHelpers._tmp_path(a) == a + ".min.pdf"
+
+
+def test_failed_copy_from_scratch_leaves_the_original(scratch, monkeypatch, make_pdf):
+    d, _=scratch
+    errors=[]
+    monkeypatch.setattr(PDFHelpers, "LogError", errors.append)
+
+    def copyfile(src, dst):
+        with open(dst, "wb") as f:
+            f.write(b"%PDF-")         # a short copy, as a dropped network connection would leave
+    monkeypatch.setattr(shutil, "copyfile", copyfile)
+    path=make_pdf(text="Body")
+    with open(path, "rb") as f:
+        original=f.read()
+    assert not PDFHelpers.CompactPdf(path)
+    assert len(errors) == 1 and "scratch" in errors[0]
+    with open(path, "rb") as f:
+        assert f.read() == original
+    assert os.listdir(d) == [] and not os.path.exists(path + ".min.pdf")
@@ -0,0 +1,65 @@
+from collections import Counter
+
+import pytest
+
+fitz=pytest.importorskip("fitz")
+pytest.importorskip("pypdf")
+
+from pypdf import PdfReader
+
+import PDFHelpers
+
+
+def _shared_pdf(path, objstms: bool) -> str:
+    # 6 text pages sharing one font and one image, each with its own content stream
+    doc=fitz.open()
+    pix=fitz.Pixmap(fitz.csGRAY, 40, 40, bytes(range(256))*6+bytes(64), False)
+    xref=0
+    for i in range(6):
+        page=doc.new_page()
+        page.insert_text((72, 144), f"Page {i+1} of the convention report", fontsize=12)
+        if xref:
+            page.insert_image(fitz.Rect(72, 200, 172, 300), xref=xref)
+        else:
+            xref=page.insert_image(fitz.Rect(72, 200, 172, 300), pixmap=pix)
+    doc.save(path, garbage=4, deflate=True, use_objstms=1 if objstms else 0)
+    doc.close()
+    return path
+
+
+def _key(ref):
+    return (ref.generation, ref.idnum)
+
+
+@pytest.mark.parametrize("objstms", [False, True])
+def test_stream_pages_keeps_shared_objects(tmp_path, objstms):
+    reader=PdfReader(_shared_pdf(str(tmp_path / "shared.pdf"), objstms))
+    cache=reader.resolved_objects
+    contents=[]
+    for i, page in enumerate(PDFHelpers._stream_pages(reader)):
+        page.extract_text()
+        for ref in page["/Resources"]["/XObject"].values():
+            ref.get_object()
+        refs=dict.get(page, "/Contents")
+        contents.append([_key(r) for r in (refs if isinstance(refs, list) else [refs])])
+        res=page["/Resources"]
+        fonts=[_key(ref) for ref in dict.values(res["/Font"])]
+        image=[_key(ref) for ref in dict.values(res["/XObject"])]
+
+    # Each page's own content stream is dropped once the page is done; the ones pages share stay
+    uses=Counter(c for page in contents for c in page)
+    assert not any(c in cache for page in contents[:-1] for c in page if uses[c] == 1)
+    assert all(c in cache for c, n in uses.items() if n > 1)
+    # Fonts stay, and so does the image every page shows
+    assert all(f in cache for f in fonts)
+    assert all(x in cache for x in image)
+    if objstms:
+        assert reader.xref_objStm
+        assert all((0, stm) in cache for stm, _ in reader.xref_objStm.values())
+
+
+def test_streaming_scan_matches_plain_scan(tmp_path):
+    path=_shared_pdf(str(tmp_path / "shared.pdf"), True)
+    plain=PDFHelpers.LowQualityScan(PdfReader(path), min_good_words_per_page=1)
+    streamed=PDFHelpers.LowQualityScan(PdfReader(path), min_good_words_per_page=1, streaming=True)
+    assert plain == streamed
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+import HelpersPackage
+from HelpersPackage import CachedSortKey, ClearSortKeyCaches, SortKey, SortRows
+
+
+# The obvious implementation: one stable sort per column, least significant first, computing every key afresh
+def _reference(rows, spec):
+    out=list(rows)
+    for item in reversed(spec):
+        column, keyfn=item[0], item[1]
+        reverse=len(item) > 2 and item[2]
+        val=column if callable(column) else (lambda row, c=column: row[c])
+        out.sort(key=(lambda row: val(row)) if keyfn is None else (lambda row: keyfn(val(row))), reverse=reverse)
+    return out
+
+
+@pytest.fixture
+def rows():
+    rnd=random.Random(5)
+    # Few distinct values per column so that there are plenty of ties; the last column identifies the row
+    return [(rnd.choice(["The Fan", "A Zine", "fan", "Zine"]), rnd.randint(1, 3), rnd.choice("ab"), i) for i in range(200)]
+
+
+@pytest.mark.parametrize("spec", [
+    [(1, None)],
+    [(1, None, True)],
+    [(0, HelpersPackage.SortTitle), (1, None)],
+    [(0, HelpersPackage.SortTitle, True), (1, None, True)],
+    [(1, None, True), (2, None)],
+    [(2, None), (1, None, True)],
+    [(0, HelpersPackage.SortTitle), (1, None, True), (2, None)],
+    [(lambda row: row[1] % 2, None, True), (2, None)],
+])
+def test_matches_stacked_stable_sorts(rows, spec):
+    # Each row carries its input position, so this also checks that ties keep their input order
+    assert SortRows(rows, spec) == _reference(rows, spec)
+
+
+def test_mixed_directions_on_dicts():
+    rows=[{"title": "b", "year": 1950}, {"title": "a", "year": 1950}, {"title": "a", "year": 1960}, {"title": "b", "year": 1960}]
+    assert SortRows(rows, [("year", None, True), ("title", None)]) == [rows[2], rows[3], rows[1], rows[0]]
+    assert SortRows(rows, []) == rows and SortRows(rows, []) is not rows
+
+
+def test_sort_key_computes_each_key_once():
+    calls=[]
+
+    def keyfn(s):
+        calls.append(s)
+        return s.lower()
+
+    cached=SortKey(keyfn)
+    assert SortKey(keyfn) is cached and SortKey(cached) is cached
+    assert sorted(["b", "A", "b", "c"], key=cached) == ["A", "b", "b", "c"]
+    assert cached.Column(["c", "A", "d"]) == ["c", "a", "d"]
+    assert sorted(calls) == ["A", "b", "c", "d"]
+    ClearSortKeyCaches()
+    cached("A")
+    assert calls.count("A") == 2
+
+
+def test_column_uses_the_batch_form(monkeypatch):
+    batches=[]
+
+    def batch(vals):
+        batches.append(list(vals))
+        return [v.upper() for v in vals]
+
+    cached=CachedSortKey(str.upper, batch)
+    assert cached.Column(["a", "b", "a"]) == ["A", "B", "A"]
+    assert cached.Column(["b", "c"]) == ["B", "C"]
+    assert [sorted(b) for b in batches] == [["a", "b"], ["c"]]
+
+    # A column that would overfill the cache empties it and starts again
+    monkeypatch.setattr(HelpersPackage, "_SORT_KEY_CACHE_MAX", 3)
+    assert cached.Column(["x", "y"]) == ["X", "Y"]
+    assert sorted(cached._cache) == ["x", "y"]